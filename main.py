@@ -1,11 +1,15 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+import orjson
+from io import BytesIO
 from datetime import datetime, timedelta
 from typing import Optional
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
@@ -15,6 +19,7 @@ from google.auth.transport import requests as google_requests
 from services.ocr_handler import extract_text_from_file
 from services.diff_engine import generate_diff_report
 from services.ai_comparator import compare_contracts_with_ai
+from services.groq_client import close_async_groq_client
 
 # NEW: Import database services
 from services.database import UserService, ReportService
@@ -57,6 +62,29 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def read_upload_limited(upload: UploadFile, label: str) -> bytes:
+    """Read an upload, failing with 413 if it exceeds MAX_UPLOAD_SIZE"""
+    size = upload.size
+    
+    # Multipart parsing usually knows the size; only read files that may fit,
+    # and never hold more than MAX_UPLOAD_SIZE + 1 bytes of one in memory
+    if size is None or size <= MAX_UPLOAD_SIZE:
+        data = await upload.read(MAX_UPLOAD_SIZE + 1)
+        if len(data) <= MAX_UPLOAD_SIZE:
+            return data
+        size = upload.file.seek(0, os.SEEK_END)
+    
+    raise HTTPException(
+        status_code=413, 
+        detail=f"{label} too large: {size / 1024 / 1024:.1f}MB (max {MAX_UPLOAD_SIZE // (1024 * 1024)}MB)"
+    )
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson (much faster than stdlib json on large reports)"""
+    def render(self, content) -> bytes:
+        # Stringify non-str keys like json.dumps did, and accept numpy scalars/arrays
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
 # Pydantic models for auth
 class SignupRequest(BaseModel):
     email: EmailStr
@@ -72,15 +100,26 @@ class GoogleAuthRequest(BaseModel):
 # ============================================
 # ORIGINAL APP SETUP
 # ============================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # The AsyncGroq client is bound to the server's event loop; close it before the loop goes
+    await close_async_groq_client()
+
+
 app = FastAPI(
     title="ClauseCompare API",
     description="AI-powered contract comparison with semantic understanding",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Keep in-memory tracking as fallback (but will use DB now)
 usage_tracker = defaultdict(lambda: {"count": 0, "month": datetime.utcnow().strftime("%Y-%m")})
 MONTHLY_LIMIT = 10  # Free tier limit
+PDF_STREAM_CHUNK_SIZE = 64 * 1024  # Bytes per chunk when streaming PDF reports
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # Per-file upload limit for /compare
 
 # ============================================
 # FIXED CORS CONFIGURATION
@@ -299,14 +338,19 @@ async def download_report_pdf(report_id: str, user_id: str = Depends(get_current
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        # Generate PDF
-        pdf_bytes = generate_pdf_report(report)
+        # Generate PDF off the event loop, then stream it out of the buffer
+        # in chunks instead of copying it into one bytes object
+        buffer = BytesIO()
+        await run_in_threadpool(generate_pdf_report, report, buffer)
+        pdf_size = buffer.tell()
+        buffer.seek(0)
         
-        return Response(
-            content=pdf_bytes,
+        return StreamingResponse(
+            iter(lambda: buffer.read(PDF_STREAM_CHUNK_SIZE), b""),
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename=clausecompare-{report_id}.pdf"
+                "Content-Disposition": f"attachment; filename=clausecompare-{report_id}.pdf",
+                "Content-Length": str(pdf_size)
             }
         )
     except HTTPException:
@@ -420,8 +464,8 @@ async def compare_contracts(
         # Validate file formats (UNCHANGED)
         allowed_extensions = ['pdf', 'docx', 'doc', 'txt']
         
-        fileA_ext = fileA.filename.lower().split('.')[-1]
-        fileB_ext = fileB.filename.lower().split('.')[-1]
+        fileA_ext = fileA.filename.rsplit('.', 1)[-1].lower()
+        fileB_ext = fileB.filename.rsplit('.', 1)[-1].lower()
         
         if fileA_ext not in allowed_extensions:
             raise HTTPException(
@@ -435,30 +479,17 @@ async def compare_contracts(
                 detail=f"Invalid file format for fileB: {fileB_ext}. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Read file contents (UNCHANGED)
+        # Read file contents, stopping early on files over the 10MB limit
         print(f"Reading files: {fileA.filename} and {fileB.filename}")
-        fileA_bytes = await fileA.read()
-        fileB_bytes = await fileB.read()
-        
-        # Check file sizes (10MB limit) (UNCHANGED)
-        max_size = 10 * 1024 * 1024
-        if len(fileA_bytes) > max_size:
-            raise HTTPException(
-                status_code=413, 
-                detail=f"fileA too large: {len(fileA_bytes) / 1024 / 1024:.1f}MB (max 10MB)"
-            )
-        if len(fileB_bytes) > max_size:
-            raise HTTPException(
-                status_code=413, 
-                detail=f"fileB too large: {len(fileB_bytes) / 1024 / 1024:.1f}MB (max 10MB)"
-            )
+        fileA_bytes = await read_upload_limited(fileA, "fileA")
+        fileB_bytes = await read_upload_limited(fileB, "fileB")
         
         print(f"File sizes: A={len(fileA_bytes)} bytes, B={len(fileB_bytes)} bytes")
         
-        # Extract text from files (UNCHANGED)
+        # Extract text from files off the event loop (pdfminer, pdfium and OCR are CPU-bound)
         print("Extracting text from fileA...")
         try:
-            text_a = extract_text_from_file(fileA_bytes, fileA.filename)
+            text_a = await run_in_threadpool(extract_text_from_file, fileA_bytes, fileA.filename)
             print(f"Extracted {len(text_a)} characters from fileA")
         except Exception as e:
             raise HTTPException(
@@ -468,7 +499,7 @@ async def compare_contracts(
         
         print("Extracting text from fileB...")
         try:
-            text_b = extract_text_from_file(fileB_bytes, fileB.filename)
+            text_b = await run_in_threadpool(extract_text_from_file, fileB_bytes, fileB.filename)
             print(f"Extracted {len(text_b)} characters from fileB")
         except Exception as e:
             raise HTTPException(
@@ -502,7 +533,7 @@ async def compare_contracts(
             print("=" * 60)
             
             try:
-                report = compare_contracts_with_ai(text_a, text_b)
+                report = await run_in_threadpool(compare_contracts_with_ai, text_a, text_b)
                 comparison_method = "AI-Powered Semantic Analysis"
                 
                 diff_count = len(report.get('diffs', []))
@@ -514,7 +545,7 @@ async def compare_contracts(
                 print(f"✗ AI comparison failed: {str(e)}")
                 print("→ Falling back to rule-based comparison...")
                 
-                report = generate_diff_report(text_a, text_b)
+                report = await run_in_threadpool(generate_diff_report, text_a, text_b)
                 comparison_method = "Rule-Based (AI Fallback)"
                 use_llm_bool = False
                 
@@ -527,7 +558,7 @@ async def compare_contracts(
             print("Using rule-based comparison")
             print("=" * 60)
             
-            report = generate_diff_report(text_a, text_b)
+            report = await run_in_threadpool(generate_diff_report, text_a, text_b)
             comparison_method = "Rule-Based"
             
             print(f"✓ Rule-based comparison completed")
@@ -536,8 +567,8 @@ async def compare_contracts(
             if use_llm_bool:
                 print("→ Enhancing with AI explanations...")
                 try:
-                    from services.llm_explainer import enhance_diffs_with_explanations
-                    report["diffs"] = enhance_diffs_with_explanations(report["diffs"], use_llm=True)
+                    from services.llm_explainer import aenhance_diffs_with_explanations
+                    report["diffs"] = await aenhance_diffs_with_explanations(report["diffs"])
                     comparison_method = "Rule-Based + AI Explanations"
                     print("✓ AI explanations added successfully")
                 except Exception as e:
@@ -549,18 +580,15 @@ async def compare_contracts(
         report_id = f"rpt-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
         
         diffs = report.get("diffs", [])
-        type_counts = {
-            "Added": sum(1 for d in diffs if d.get('type') == 'Added'),
-            "Removed": sum(1 for d in diffs if d.get('type') == 'Removed'),
-            "Modified": sum(1 for d in diffs if d.get('type') == 'Modified'),
-            "Reworded": sum(1 for d in diffs if d.get('type') == 'Reworded')
-        }
+        type_counts = {"Added": 0, "Removed": 0, "Modified": 0, "Reworded": 0}
+        severity_counts = {"High": 0, "Medium": 0, "Low": 0}
         
-        severity_counts = {
-            "High": sum(1 for d in diffs if d.get('severity') == 'High'),
-            "Medium": sum(1 for d in diffs if d.get('severity') == 'Medium'),
-            "Low": sum(1 for d in diffs if d.get('severity') == 'Low')
-        }
+        # Tally both breakdowns in a single pass over the diffs
+        for d in diffs:
+            if d.get('type') in type_counts:
+                type_counts[d['type']] += 1
+            if d.get('severity') in severity_counts:
+                severity_counts[d['severity']] += 1
         
         # Build response (UNCHANGED structure)
         response = {
@@ -604,7 +632,7 @@ async def compare_contracts(
         print(f"✓ High risk: {severity_counts['High']}, Medium: {severity_counts['Medium']}, Low: {severity_counts['Low']}")
         print("=" * 60)
         
-        return JSONResponse(content=response)
+        return ORJSONResponse(content=response)
         
     except HTTPException:
         raise
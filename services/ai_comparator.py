@@ -1,7 +1,11 @@
 import os
 import json
 from typing import Dict, List
-from groq import Groq
+
+from services.groq_client import get_groq_client
+
+
+_JSON_DECODER = json.JSONDecoder()
 
 
 ENHANCED_SYSTEM_PROMPT = """You are the core intelligence behind ClauseCompare — an AI that compares two legal contracts clause by clause.
@@ -80,7 +84,7 @@ def compare_contracts_with_ai(text_a: str, text_b: str) -> Dict:
         raise Exception("GROQ_API_KEY not set. AI comparison requires API key.")
     
     try:
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key)
         
         prompt = build_enhanced_comparison_prompt(text_a, text_b)
         
@@ -169,24 +173,18 @@ Return your analysis as a JSON object matching the specified format."""
 def extract_json_from_response(content: str) -> Dict:
     """Extract JSON from AI response, handling markdown code blocks"""
     
-    # Try to extract JSON from markdown code blocks
-    if "```json" in content:
-        json_str = content.split("```json")[1].split("```")[0].strip()
-    elif "```" in content:
-        json_str = content.split("```")[1].split("```")[0].strip()
-    else:
-        json_str = content.strip()
-    
-    # Remove any leading/trailing whitespace
-    json_str = json_str.strip()
+    # Decode the first JSON object in place; skips markdown fences or prose around it
+    start = content.find("{")
     
     # Parse JSON
     try:
-        result = json.loads(json_str)
+        if start == -1:
+            raise json.JSONDecodeError("No JSON object found", content, 0)
+        result, _ = _JSON_DECODER.raw_decode(content, start)
         return result
     except json.JSONDecodeError as e:
         print(f"Failed to parse JSON: {e}")
-        print(f"Content preview: {json_str[:500]}")
+        print(f"Content preview: {content[max(start, 0):max(start, 0) + 500]}")
         raise Exception(f"AI returned invalid JSON: {str(e)}")
 
 
@@ -1,8 +1,150 @@
-import difflib
 import re
-from typing import List, Dict, Tuple
-
-
+from functools import lru_cache, wraps
+from typing import List, Dict, Tuple, Sequence, Optional, Iterator
+
+
+# Texts longer than this (on both sides) are compared word-by-word
+TOKEN_SIMILARITY_MIN_CHARS = 200
+
+_WORD_RE = re.compile(r'\w+')
+
+# Per-clause memoization: entries per cache, and the longest text worth caching.
+# Longer texts (e.g. a whole document that didn't segment) are computed uncached,
+# so each cache holds at most CLAUSE_CACHE_SIZE * CLAUSE_CACHE_MAX_CHARS characters.
+CLAUSE_CACHE_SIZE = 256
+CLAUSE_CACHE_MAX_CHARS = 2000
+
+
+def _clause_cache(func):
+    """lru_cache for functions of one clause text, skipping texts over CLAUSE_CACHE_MAX_CHARS"""
+    cached = lru_cache(maxsize=CLAUSE_CACHE_SIZE)(func)
+    
+    @wraps(func)
+    def wrapper(text):
+        if len(text) > CLAUSE_CACHE_MAX_CHARS:
+            return func(text)
+        return cached(text)
+    
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+# Keyword tiers for removed/added clause severity (one scan per tier)
+_REMOVAL_CRITICAL_RE = re.compile(r'confidential|liability|indemnif|intellectual property|warranty')
+_REMOVAL_IMPORTANT_RE = re.compile(r'termination|payment|dispute|governing law')
+_ADDITION_CRITICAL_RE = re.compile(r'liability|indemnif|penalty|liquidated damages')
+_ADDITION_IMPORTANT_RE = re.compile(r'confidential|termination|obligation|restriction')
+
+
+# Gap allowed between the parts of a pattern: same line, as '.*' was (periods
+# allowed, e.g. "section 9.1", "inc."), but bounded so search stays linear on
+# long single-line (e.g. PDF) text
+_GAP = r'[^\n]{0,400}'
+
+
+def _any_of(*patterns: str) -> re.Pattern:
+    """Compile alternative patterns into one regex so text is scanned once"""
+    return re.compile('|'.join(f'(?:{p})' for p in patterns))
+
+
+_NUMBERED_HEADING_RE = re.compile(r'^(\d+)\.\s*([A-Z][A-Z\s]+)$')
+
+# Patterns that indicate liability caps
+_LIABILITY_CAP_RE = _any_of(
+    r'sole\s+(?:and\s+)?exclusive\s+remedy',
+    r'limited\s+to\s+(?:the\s+)?(?:amount|sum)',
+    r'liability\s+(?:is\s+)?capped',
+    r'maximum\s+liability',
+    r'in\s+no\s+event' + _GAP + r'exceed',
+)
+
+# Patterns that indicate protection from consequential/punitive damages
+_DAMAGES_PROTECTION_RE = _any_of(
+    r'no\s+(?:liability|responsibility)\s+for\s+(?:any\s+)?(?:consequential|indirect|punitive|special)',
+    r'not\s+(?:be\s+)?liable\s+for\s+(?:any\s+)?(?:consequential|indirect|punitive|special)',
+    r'excluding\s+(?:consequential|indirect|punitive|special)',
+    r'shall\s+not' + _GAP + r'(?:consequential|indirect|punitive)',
+)
+
+# Patterns that indicate a written confirmation requirement
+_WRITTEN_CONFIRMATION_RE = _any_of(
+    r'in\s+writing\s+within\s+(\d+)\s*day',
+    r'written\s+(?:confirmation|notice|consent)\s+(?:within|required)',
+    r'must\s+be\s+(?:confirmed|documented)\s+in\s+writing',
+    r'oral' + _GAP + r'(?:confirmed|reduced)\s+to\s+writing',
+)
+
+# Literals at least one of which every pattern in the category needs;
+# lets the predicates skip the regex on clauses that can't match
+_LIABILITY_CAP_GATE = ('remedy', 'limited', 'capped', 'maximum', 'exceed')
+_DAMAGES_PROTECTION_GATE = ('consequential', 'indirect', 'punitive', 'special')
+_WRITTEN_CONFIRMATION_GATE = ('writing', 'written')
+
+_WITHIN_DAYS_RE = re.compile(r'within\s+(\d+)\s*day')
+
+_PERIOD_WORD_TO_NUM = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12,
+    'fifteen': 15, 'eighteen': 18, 'twenty': 20, 'twenty-four': 24,
+    'thirty': 30, 'forty-five': 45, 'sixty': 60, 'ninety': 90
+}
+
+# "5 years", "two (2) years" or "five years"; a parenthesized digit wins over
+# the word before it, since the word alone can't be followed by "(" and a unit
+_PERIOD_RE = re.compile(
+    r'(?:\(?(?P<digits>\d+)\)?|\b(?P<word>' + '|'.join(_PERIOD_WORD_TO_NUM) + r')\b)'
+    r'\s*(?P<unit>year|month|day)'
+)
+
+
+# Clause type aliases mapping, checked in order against lowercased titles
+_CLAUSE_ALIASES = {
+    # Payment/Compensation
+    "compensation": "Payment Terms",
+    "payment": "Payment Terms",
+    "fee": "Payment Terms",
+    "fees": "Payment Terms",
+    "pricing": "Payment Terms",
+    "cost": "Payment Terms",
+    
+    # Intellectual Property
+    "ip": "Intellectual Property",
+    "ip rights": "Intellectual Property",
+    "intellectual property": "Intellectual Property",
+    "copyright": "Intellectual Property",
+    "patent": "Intellectual Property",
+    "trademark": "Intellectual Property",
+    
+    # Liability
+    "liability": "Liability",
+    "indemnification": "Liability",
+    "indemnity": "Liability",
+    
+    # Confidentiality
+    "confidential": "Confidentiality",
+    "confidentiality": "Confidentiality",
+    "nda": "Confidentiality",
+    "non-disclosure": "Confidentiality",
+    
+    # Termination
+    "termination": "Termination",
+    "end of agreement": "Termination",
+    "cancellation": "Termination",
+    
+    # Governing Law
+    "governing law": "Governing Law",
+    "jurisdiction": "Governing Law",
+    "applicable law": "Governing Law",
+    
+    # Scope
+    "scope": "Scope of Work",
+    "scope of work": "Scope of Work",
+    "deliverables": "Scope of Work",
+    "services": "Scope of Work"
+}
+
+
+@lru_cache(maxsize=256)
 def normalize_clause_title(title: str) -> str:
     """
     Normalize clause titles to handle fuzzy matching.
@@ -10,54 +152,8 @@ def normalize_clause_title(title: str) -> str:
     """
     title_lower = title.lower().strip()
     
-    # Clause type aliases mapping
-    ALIASES = {
-        # Payment/Compensation
-        "compensation": "Payment Terms",
-        "payment": "Payment Terms",
-        "fee": "Payment Terms",
-        "fees": "Payment Terms",
-        "pricing": "Payment Terms",
-        "cost": "Payment Terms",
-        
-        # Intellectual Property
-        "ip": "Intellectual Property",
-        "ip rights": "Intellectual Property",
-        "intellectual property": "Intellectual Property",
-        "copyright": "Intellectual Property",
-        "patent": "Intellectual Property",
-        "trademark": "Intellectual Property",
-        
-        # Liability
-        "liability": "Liability",
-        "indemnification": "Liability",
-        "indemnity": "Liability",
-        
-        # Confidentiality
-        "confidential": "Confidentiality",
-        "confidentiality": "Confidentiality",
-        "nda": "Confidentiality",
-        "non-disclosure": "Confidentiality",
-        
-        # Termination
-        "termination": "Termination",
-        "end of agreement": "Termination",
-        "cancellation": "Termination",
-        
-        # Governing Law
-        "governing law": "Governing Law",
-        "jurisdiction": "Governing Law",
-        "applicable law": "Governing Law",
-        
-        # Scope
-        "scope": "Scope of Work",
-        "scope of work": "Scope of Work",
-        "deliverables": "Scope of Work",
-        "services": "Scope of Work"
-    }
-    
     # Check for direct matches
-    for alias, standard_name in ALIASES.items():
+    for alias, standard_name in _CLAUSE_ALIASES.items():
         if alias in title_lower:
             return standard_name
     
@@ -65,16 +161,43 @@ def normalize_clause_title(title: str) -> str:
     return title.strip()
 
 
+def _iter_lines(text: str) -> Iterator[str]:
+    """
+    Yield the '\n'-separated lines of text one at a time, like text.split('\n')
+    but without holding a list of every line (or a second copy of the text)
+    """
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
 def segment_clauses(text: str) -> List[Dict[str, str]]:
     """
     Segment contract text into clauses with improved detection.
     Handles numbered sections, headings, and subsections better.
     """
+    return [dict(clause) for clause in _segment_clauses(text)]
+
+
+# Keys are whole contract texts, so only the last couple of comparisons are kept
+_SEGMENT_CACHE_SIZE = 4
+
+
+@lru_cache(maxsize=_SEGMENT_CACHE_SIZE)
+def _segment_clauses(text: str) -> Tuple[Dict[str, str], ...]:
+    """
+    segment_clauses as a cached tuple, for callers that only read the clauses.
+    Callers must not mutate the returned dicts; use segment_clauses for copies.
+    """
     clauses = []
-    lines = text.split('\n')
     current_clause = {"title": "", "content": "", "number": ""}
     
-    for line in lines:
+    for line in _iter_lines(text):
         stripped = line.strip()
         
         # Skip empty lines
@@ -82,7 +205,7 @@ def segment_clauses(text: str) -> List[Dict[str, str]]:
             continue
         
         # Detect numbered headings (1., 2., etc. or 1. HEADING)
-        numbered_heading = re.match(r'^(\d+)\.\s*([A-Z][A-Z\s]+)$', stripped)
+        numbered_heading = _NUMBERED_HEADING_RE.match(stripped)
         if numbered_heading:
             if current_clause["content"]:
                 clauses.append(current_clause.copy())
@@ -118,17 +241,98 @@ def segment_clauses(text: str) -> List[Dict[str, str]]:
     if not clauses:
         clauses = [{"title": "Document", "content": text, "number": ""}]
     
-    return clauses
+    return tuple(clauses)
+
+
+def tokenize(text: str) -> List[int]:
+    """Split text into lowercase word hashes for token-level comparison"""
+    return [hash(word) for word in _WORD_RE.findall(text.lower())]
+
+
+@_clause_cache
+def _tokens(text: str) -> Tuple[int, ...]:
+    """tokenize as a cached tuple; clauses are compared against many candidates"""
+    return tuple(tokenize(text))
+
+
+def char_lcs_length(a: Sequence, b: Sequence) -> int:
+    """
+    Length of the longest common subsequence of two strings (or any sequences
+    of hashable items, e.g. word tokens), using the bit-parallel algorithm
+    (Allison-Dix / Hyyro): each row of the LCS table is one integer, updated
+    with a few big-int operations per item of b.
+    """
+    if not a or not b:
+        return 0
+    
+    # Shared leading/trailing items are always part of the LCS, so only the
+    # divergent middle (usually a small edit window) needs the bit-parallel pass
+    n, m = len(a), len(b)
+    start = 0
+    while start < n and start < m and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < n - start and end < m - start and a[n - 1 - end] == b[m - 1 - end]:
+        end += 1
+    common = start + end
+    a = a[start:n - end]
+    b = b[start:m - end]
+    if not a or not b:
+        return common
+    
+    # Bit i of masks[ch] is set where a[i] == ch
+    masks = {}
+    for i, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    
+    full = (1 << len(a)) - 1
+    v = full
+    for ch in b:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    
+    # Each zero bit left in v is one matched character
+    return common + len(a) - bin(v).count('1')
 
 
 def calculate_similarity(text1: str, text2: str) -> float:
-    """Calculate similarity ratio between two texts using difflib"""
+    """
+    Calculate similarity ratio between two texts.
+    Long texts are compared on word tokens, short ones on characters; both
+    use char_lcs_length and return 2 * LCS / total length.
+    """
     if not text1 or not text2:
         return 0.0
-    return difflib.SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+    if text1 == text2:
+        return 1.0  # Unchanged clauses skip the matcher entirely
+    if len(text1) > TOKEN_SIMILARITY_MIN_CHARS and len(text2) > TOKEN_SIMILARITY_MIN_CHARS:
+        tokens1, tokens2 = _tokens(text1), _tokens(text2)
+        if not tokens1 and not tokens2:
+            return 1.0
+        return 2.0 * char_lcs_length(tokens1, tokens2) / (len(tokens1) + len(tokens2))
+    # Lowercasing can change length (e.g. "İ" -> "i̇"), so divide by the compared lengths
+    lower1, lower2 = text1.lower(), text2.lower()
+    return 2.0 * char_lcs_length(lower1, lower2) / (len(lower1) + len(lower2))
+
+
+def _similarity_upper_bound(text1: str, text2: str) -> float:
+    """
+    Cheap ceiling on calculate_similarity(text1, text2) from lengths alone:
+    the LCS can't be longer than the shorter side.
+    """
+    if not text1 or not text2:
+        return 0.0
+    if len(text1) > TOKEN_SIMILARITY_MIN_CHARS and len(text2) > TOKEN_SIMILARITY_MIN_CHARS:
+        n, m = len(_tokens(text1)), len(_tokens(text2))
+    else:
+        # Same lowercased lengths calculate_similarity divides by
+        n, m = len(text1.lower()), len(text2.lower())
+    if n + m == 0:
+        return 1.0
+    return 2.0 * min(n, m) / (n + m)
 
 
-def match_clauses(clauses_a: List[Dict], clauses_b: List[Dict]) -> List[Tuple]:
+def match_clauses(clauses_a: Sequence[Dict], clauses_b: Sequence[Dict]) -> List[Tuple]:
     """
     Match clauses between two contracts with improved matching.
     Returns list of tuples: (clause_a_idx, clause_b_idx, similarity)
@@ -136,39 +340,59 @@ def match_clauses(clauses_a: List[Dict], clauses_b: List[Dict]) -> List[Tuple]:
     matches = []
     used_b = set()
     
+    # Index numbered clauses of B so number matches skip the similarity scan
+    by_number = {}
+    for j, clause_b in enumerate(clauses_b):
+        if clause_b.get("number"):
+            by_number.setdefault(clause_b["number"], []).append(j)
+    
     for i, clause_a in enumerate(clauses_a):
         best_match = None
         best_similarity = 0.0
+        best_content_similarity = None
         
-        for j, clause_b in enumerate(clauses_b):
-            if j in used_b:
-                continue
-            
-            # Match by number first (if available)
-            if clause_a.get("number") and clause_b.get("number"):
-                if clause_a["number"] == clause_b["number"]:
+        # Match by number first (if available)
+        if clause_a.get("number"):
+            best_match = next(
+                (j for j in by_number.get(clause_a["number"], []) if j not in used_b),
+                None
+            )
+        
+        # Otherwise pick the most similar unused clause
+        if best_match is None:
+            for j, clause_b in enumerate(clauses_b):
+                if j in used_b:
+                    continue
+                
+                # Match by title similarity
+                title_sim = calculate_similarity(clause_a["title"], clause_b["title"])
+                
+                # Skip the content comparison when even a perfect length-bound
+                # score couldn't beat the current best (or the 0.2 floor)
+                best_possible = title_sim * 0.5 + _similarity_upper_bound(
+                    clause_a["content"], clause_b["content"]
+                ) * 0.5
+                if best_possible <= best_similarity or best_possible <= 0.2:
+                    continue
+                
+                content_sim = calculate_similarity(clause_a["content"], clause_b["content"])
+                
+                # Weighted similarity (title more important for matching)
+                similarity = title_sim * 0.5 + content_sim * 0.5
+                
+                if similarity > best_similarity and similarity > 0.2:
+                    best_similarity = similarity
+                    best_content_similarity = content_sim
                     best_match = j
-                    best_similarity = 0.9  # High similarity for number match
-                    break
-            
-            # Match by title similarity
-            title_sim = calculate_similarity(clause_a["title"], clause_b["title"])
-            content_sim = calculate_similarity(clause_a["content"], clause_b["content"])
-            
-            # Weighted similarity (title more important for matching)
-            similarity = title_sim * 0.5 + content_sim * 0.5
-            
-            if similarity > best_similarity and similarity > 0.2:
-                best_similarity = similarity
-                best_match = j
         
         if best_match is not None:
-            # Recalculate content similarity for matched clauses
-            content_similarity = calculate_similarity(
-                clauses_a[i]["content"], 
-                clauses_b[best_match]["content"]
-            )
-            matches.append((i, best_match, content_similarity))
+            # Number matches still need their content similarity
+            if best_content_similarity is None:
+                best_content_similarity = calculate_similarity(
+                    clauses_a[i]["content"], 
+                    clauses_b[best_match]["content"]
+                )
+            matches.append((i, best_match, best_content_similarity))
             used_b.add(best_match)
     
     return matches
@@ -183,100 +407,157 @@ def extract_numbers(text: str, pattern: str) -> List[int]:
 def extract_years(text: str) -> int:
     """Extract number of years from text"""
     # Match patterns like "5 years", "five (5) years", etc.
-    matches = re.findall(r'(\d+)\s*year', text.lower())
-    if matches:
-        return int(matches[0])
-    return 999  # Default high value if not found
+    # Defaults to 999 (high value) if not found
+    return _extract_periods_lower(text.lower())[0]
 
 
 def extract_days(text: str) -> int:
     """Extract number of days from text"""
-    matches = re.findall(r'(\d+)\s*day', text.lower())
-    if matches:
-        return int(matches[0])
-    return 999
+    return _extract_periods_lower(text.lower())[2]
 
 
 def extract_months(text: str) -> int:
     """Extract number of months from text"""
-    matches = re.findall(r'(\d+)\s*month', text.lower())
-    if matches:
-        return int(matches[0])
-    return 999
+    return _extract_periods_lower(text.lower())[1]
+
+
+def extract_periods(text: str) -> Tuple[int, int, int]:
+    """
+    Extract (years, months, days) from text in a single pass.
+    Each value is the first one found for that unit, or 999 if not found.
+    """
+    return _extract_periods_lower(text.lower())
+
+
+@_clause_cache
+def _extract_periods_lower(text_lower: str) -> Tuple[int, int, int]:
+    """extract_periods on text that is already lowercased"""
+    found = {}
+    for match in _PERIOD_RE.finditer(text_lower):
+        digits = match.group('digits')
+        value = int(digits) if digits else _PERIOD_WORD_TO_NUM[match.group('word')]
+        found.setdefault(match.group('unit'), value)
+        if len(found) == 3:
+            break
+    return (found.get('year', 999), found.get('month', 999), found.get('day', 999))
+
+
+# Dollar figures like $10,000 or $10000.00
+_DOLLAR_AMOUNT_RE = re.compile(r'\$\s*([\d,]+(?:\.\d{2})?)')
+
+# Written amounts ("ten thousand") as (scale word, value, "<number word> <scale>" pattern)
+_WRITTEN_AMOUNTS = tuple(
+    (word, value, re.compile(rf'(\w+)\s+{word}'))
+    for word, value in (
+        ('thousand', 1000),
+        ('million', 1000000),
+        ('hundred thousand', 100000),
+    )
+)
+
+_AMOUNT_WORD_TO_NUM = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+    'fifteen': 15, 'twenty': 20, 'fifty': 50, 'hundred': 100
+}
 
 
 def extract_amounts(text: str) -> List[float]:
     """Extract dollar amounts from text"""
+    return list(_extract_amounts(text))
+
+
+@_clause_cache
+def _extract_amounts(text: str) -> Tuple[float, ...]:
+    """extract_amounts as an immutable (cacheable) tuple"""
     # Match $10,000 or $10000 or Ten Thousand Dollars
-    matches = re.findall(r'\$\s*([\d,]+(?:\.\d{2})?)', text)
+    matches = _DOLLAR_AMOUNT_RE.findall(text)
     amounts = [float(m.replace(',', '')) for m in matches]
     
     # Also match written numbers
-    text_amounts = {
-        'thousand': 1000,
-        'million': 1000000,
-        'hundred thousand': 100000
-    }
-    
     text_lower = text.lower()
-    for word, value in text_amounts.items():
+    for word, value, pattern in _WRITTEN_AMOUNTS:
         if word in text_lower:
-            number_match = re.search(rf'(\w+)\s+{word}', text_lower)
+            number_match = pattern.search(text_lower)
             if number_match:
-                word_to_num = {
-                    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
-                    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
-                    'fifteen': 15, 'twenty': 20, 'fifty': 50, 'hundred': 100
-                }
-                word_num = word_to_num.get(number_match.group(1), 1)
+                word_num = _AMOUNT_WORD_TO_NUM.get(number_match.group(1), 1)
                 amounts.append(word_num * value)
     
-    return amounts
+    return tuple(amounts)
+
 
+_US_STATES = (
+    'alabama', 'alaska', 'arizona', 'arkansas', 'california', 'colorado',
+    'connecticut', 'delaware', 'florida', 'georgia', 'hawaii', 'idaho',
+    'illinois', 'indiana', 'iowa', 'kansas', 'kentucky', 'louisiana',
+    'maine', 'maryland', 'massachusetts', 'michigan', 'minnesota',
+    'mississippi', 'missouri', 'montana', 'nebraska', 'nevada',
+    'new hampshire', 'new jersey', 'new mexico', 'new york',
+    'north carolina', 'north dakota', 'ohio', 'oklahoma', 'oregon',
+    'pennsylvania', 'rhode island', 'south carolina', 'south dakota',
+    'tennessee', 'texas', 'utah', 'vermont', 'virginia', 'washington',
+    'west virginia', 'wisconsin', 'wyoming'
+)
 
+# One scan for every state; longest names first so "west virginia" isn't
+# reported as "virginia", and word boundaries so "remained" isn't "maine"
+_US_STATE_RE = re.compile(
+    r'\b(' + '|'.join(
+        state.replace(' ', r'\s+') for state in sorted(_US_STATES, key=len, reverse=True)
+    ) + r')\b'
+)
+
+
+@_clause_cache
 def extract_state(text: str) -> str:
     """Extract US state name from text"""
-    states = [
-        'alabama', 'alaska', 'arizona', 'arkansas', 'california', 'colorado',
-        'connecticut', 'delaware', 'florida', 'georgia', 'hawaii', 'idaho',
-        'illinois', 'indiana', 'iowa', 'kansas', 'kentucky', 'louisiana',
-        'maine', 'maryland', 'massachusetts', 'michigan', 'minnesota',
-        'mississippi', 'missouri', 'montana', 'nebraska', 'nevada',
-        'new hampshire', 'new jersey', 'new mexico', 'new york',
-        'north carolina', 'north dakota', 'ohio', 'oklahoma', 'oregon',
-        'pennsylvania', 'rhode island', 'south carolina', 'south dakota',
-        'tennessee', 'texas', 'utah', 'vermont', 'virginia', 'washington',
-        'west virginia', 'wisconsin', 'wyoming'
-    ]
-    
-    text_lower = text.lower()
-    for state in states:
-        if state in text_lower:
-            return state.title()
+    match = _US_STATE_RE.search(text.lower())
+    if match:
+        return ' '.join(match.group(1).split()).title()
     return ""
 
 
 # ========== NEW ENHANCED DETECTION FUNCTIONS ==========
 
+# Pattern checks are pure functions of the (lowercased) clause text, so they
+# are memoized for repeated comparisons of the same contract revisions.
+
+@_clause_cache
+def _has_liability_cap(text_lower: str) -> bool:
+    """Check if lowercased text contains a liability cap"""
+    if not any(word in text_lower for word in _LIABILITY_CAP_GATE):
+        return False
+    return bool(_LIABILITY_CAP_RE.search(text_lower))
+
+
+@_clause_cache
+def _has_consequential_damages_protection(text_lower: str) -> bool:
+    """Check if lowercased text excludes consequential/punitive damages"""
+    if not any(word in text_lower for word in _DAMAGES_PROTECTION_GATE):
+        return False
+    return bool(_DAMAGES_PROTECTION_RE.search(text_lower))
+
+
+@_clause_cache
+def _requires_written_confirmation(text_lower: str) -> bool:
+    """Check if lowercased text requires written confirmation"""
+    if not any(word in text_lower for word in _WRITTEN_CONFIRMATION_GATE):
+        return False
+    return bool(_WRITTEN_CONFIRMATION_RE.search(text_lower))
+
+
 def detect_liability_cap_changes(old_text: str, new_text: str) -> Tuple[bool, str]:
     """
     Detect if liability caps were added/removed/changed.
     Returns (is_critical, explanation)
     """
-    old_lower = old_text.lower()
-    new_lower = new_text.lower()
-    
-    # Patterns that indicate liability caps
-    cap_patterns = [
-        r'sole\s+(?:and\s+)?exclusive\s+remedy',
-        r'limited\s+to\s+(?:the\s+)?(?:amount|sum)',
-        r'liability\s+(?:is\s+)?capped',
-        r'maximum\s+liability',
-        r'in\s+no\s+event.*exceed',
-    ]
-    
-    old_has_cap = any(re.search(p, old_lower) for p in cap_patterns)
-    new_has_cap = any(re.search(p, new_lower) for p in cap_patterns)
+    return _liability_cap_change(old_text.lower(), new_text.lower())
+
+
+def _liability_cap_change(old_lower: str, new_lower: str) -> Tuple[bool, str]:
+    """detect_liability_cap_changes on lowercased texts"""
+    old_has_cap = _has_liability_cap(old_lower)
+    new_has_cap = _has_liability_cap(new_lower)
     
     if not old_has_cap and new_has_cap:
         return (True, "New liability cap added - limits your legal recourse to specific remedies")
@@ -292,18 +573,13 @@ def detect_consequential_damages_changes(old_text: str, new_text: str) -> Tuple[
     Detect if consequential/punitive damages protections were changed.
     Returns (is_critical, explanation)
     """
-    old_lower = old_text.lower()
-    new_lower = new_text.lower()
-    
-    protection_patterns = [
-        r'no\s+(?:liability|responsibility)\s+for\s+(?:any\s+)?(?:consequential|indirect|punitive|special)',
-        r'not\s+(?:be\s+)?liable\s+for\s+(?:any\s+)?(?:consequential|indirect|punitive|special)',
-        r'excluding\s+(?:consequential|indirect|punitive|special)',
-        r'shall\s+not.*(?:consequential|indirect|punitive)',
-    ]
-    
-    old_has_protection = any(re.search(p, old_lower) for p in protection_patterns)
-    new_has_protection = any(re.search(p, new_lower) for p in protection_patterns)
+    return _consequential_damages_change(old_text.lower(), new_text.lower())
+
+
+def _consequential_damages_change(old_lower: str, new_lower: str) -> Tuple[bool, str]:
+    """detect_consequential_damages_changes on lowercased texts"""
+    old_has_protection = _has_consequential_damages_protection(old_lower)
+    new_has_protection = _has_consequential_damages_protection(new_lower)
     
     if old_has_protection and not new_has_protection:
         return (True, "Protection from consequential/punitive damages REMOVED - you may now be liable for indirect damages")
@@ -319,22 +595,17 @@ def detect_written_confirmation_requirement(old_text: str, new_text: str) -> Tup
     Detect if written confirmation requirements were changed.
     Returns (is_critical, explanation)
     """
-    old_lower = old_text.lower()
-    new_lower = new_text.lower()
-    
-    written_patterns = [
-        r'in\s+writing\s+within\s+(\d+)\s*day',
-        r'written\s+(?:confirmation|notice|consent)\s+(?:within|required)',
-        r'must\s+be\s+(?:confirmed|documented)\s+in\s+writing',
-        r'oral.*(?:confirmed|reduced)\s+to\s+writing',
-    ]
-    
-    old_requires_written = any(re.search(p, old_lower) for p in written_patterns)
-    new_requires_written = any(re.search(p, new_lower) for p in written_patterns)
+    return _written_confirmation_change(old_text.lower(), new_text.lower())
+
+
+def _written_confirmation_change(old_lower: str, new_lower: str) -> Tuple[bool, str]:
+    """detect_written_confirmation_requirement on lowercased texts"""
+    old_requires_written = _requires_written_confirmation(old_lower)
+    new_requires_written = _requires_written_confirmation(new_lower)
     
     if old_requires_written and not new_requires_written:
         # Extract the time period if present
-        time_match = re.search(r'within\s+(\d+)\s*day', old_lower)
+        time_match = _WITHIN_DAYS_RE.search(old_lower)
         if time_match:
             days = time_match.group(1)
             return (True, f"Written confirmation requirement REMOVED (was required within {days} days) - oral agreements now may be binding")
@@ -348,12 +619,14 @@ def detect_survival_period_changes(old_text: str, new_text: str) -> Tuple[bool,
     Detect if survival/duration periods changed.
     Returns (is_critical, explanation)
     """
-    old_lower = old_text.lower()
-    new_lower = new_text.lower()
-    
+    return _survival_period_change(old_text.lower(), new_text.lower())
+
+
+def _survival_period_change(old_lower: str, new_lower: str) -> Tuple[bool, str]:
+    """detect_survival_period_changes on lowercased texts"""
     # Extract survival periods
-    old_years = extract_years(old_text)
-    new_years = extract_years(new_text)
+    old_years, old_months, _ = _extract_periods_lower(old_lower)
+    new_years, new_months, _ = _extract_periods_lower(new_lower)
     
     if old_years != 999 and new_years != 999 and old_years != new_years:
         if new_years < old_years:
@@ -366,18 +639,16 @@ def detect_survival_period_changes(old_text: str, new_text: str) -> Tuple[bool,
             return (False, f"Survival period extended from {old_years} years to {new_years} years")
     
     # Check months
-    old_months = extract_months(old_text)
-    new_months = extract_months(new_text)
-    
     if old_months != 999 and new_months != 999 and new_months < old_months:
         return (True, f"Duration reduced from {old_months} months to {new_months} months")
     
     return (False, "")
 
 
-def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tuple[str, str]:
+def detect_risk_patterns(old_text: str, new_text: str, clause_title: str, similarity: Optional[float] = None) -> Tuple[str, str]:
     """
     ENHANCED risk pattern detection with NEW critical checks.
+    Pass the clauses' content similarity if already known (e.g. from matching).
     Returns (severity, risk_type)
     """
     old_lower = old_text.lower()
@@ -385,37 +656,37 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
     title_lower = clause_title.lower()
     
     # === NEW CRITICAL PATTERN CHECKS ===
+    # (all detectors below share the lowercased texts computed above)
     
     # 1. Liability Cap Changes (catches "sole remedy" additions)
-    is_critical, explanation = detect_liability_cap_changes(old_text, new_text)
+    is_critical, explanation = _liability_cap_change(old_lower, new_lower)
     if is_critical:
         return ("High", explanation)
     
     # 2. Consequential Damages Protection (catches protection removals)
-    is_critical, explanation = detect_consequential_damages_changes(old_text, new_text)
+    is_critical, explanation = _consequential_damages_change(old_lower, new_lower)
     if is_critical:
         return ("High", explanation)
     
     # 3. Written Confirmation Requirements (catches oral→written requirement deletions)
-    is_critical, explanation = detect_written_confirmation_requirement(old_text, new_text)
+    is_critical, explanation = _written_confirmation_change(old_lower, new_lower)
     if is_critical:
         return ("High", explanation)
     
     # 4. Survival Period Changes (catches 3yr→1yr reductions)
     if 'surviv' in title_lower or 'surviv' in old_lower or 'confidential' in title_lower:
-        is_critical, explanation = detect_survival_period_changes(old_text, new_text)
+        is_critical, explanation = _survival_period_change(old_lower, new_lower)
         if is_critical:
             return ("High", explanation)
     
     # === EXISTING CHECKS (Enhanced) ===
     
+    # Durations are shared by several checks below; extract them once
+    old_years, old_months, old_days = _extract_periods_lower(old_lower)
+    new_years, new_months, new_days = _extract_periods_lower(new_lower)
+    
     # 5. Confidentiality Period Changes
     if 'confidential' in title_lower or 'confidential' in old_lower:
-        old_years = extract_years(old_text)
-        new_years = extract_years(new_text)
-        old_months = extract_months(old_text)
-        new_months = extract_months(new_text)
-        
         # Check year changes
         if old_years != 999 and new_years != 999:
             if new_years < old_years:
@@ -431,9 +702,6 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
     
     # 6. Termination Notice Period Changes
     if 'terminat' in title_lower or 'terminat' in old_lower:
-        old_days = extract_days(old_text)
-        new_days = extract_days(new_text)
-        
         if old_days != 999 and new_days != 999 and new_days < old_days:
             reduction_pct = ((old_days - new_days) / old_days) * 100
             if reduction_pct >= 40:
@@ -443,8 +711,8 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
     
     # 7. Payment Amount Changes
     if 'payment' in title_lower or 'fee' in old_lower or 'consideration' in old_lower:
-        old_amounts = extract_amounts(old_text)
-        new_amounts = extract_amounts(new_text)
+        old_amounts = _extract_amounts(old_text)
+        new_amounts = _extract_amounts(new_text)
         
         if old_amounts and new_amounts:
             if new_amounts[0] > old_amounts[0]:
@@ -457,8 +725,6 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
                 return ("Low", "Payment amount decreased")
         
         # Check payment deadline changes
-        old_days = extract_days(old_text)
-        new_days = extract_days(new_text)
         if old_days != 999 and new_days != 999 and new_days < old_days:
             if abs(old_days - new_days) >= 15:
                 return ("High", f"Payment deadline shortened from {old_days} to {new_days} days")
@@ -471,8 +737,8 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
         if 'cap' in old_lower and 'cap' not in new_lower:
             return ("High", "Liability cap removed")
         
-        old_amounts = extract_amounts(old_text)
-        new_amounts = extract_amounts(new_text)
+        old_amounts = _extract_amounts(old_text)
+        new_amounts = _extract_amounts(new_text)
         if old_amounts and not new_amounts:
             return ("High", "Liability cap removed")
         if old_amounts and new_amounts and new_amounts[0] > old_amounts[0]:
@@ -481,9 +747,8 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
     # 9. Non-Compete Clause Detection
     if 'non-compete' in title_lower or 'non compete' in title_lower or 'noncompete' in title_lower:
         if 'compete' in new_lower and 'compete' not in old_lower:
-            years = extract_years(new_text)
-            if years != 999:
-                return ("High", f"New non-compete restriction added ({years} years)")
+            if new_years != 999:
+                return ("High", f"New non-compete restriction added ({new_years} years)")
             return ("High", "New non-compete restriction added")
     
     # 10. Governing Law Changes
@@ -507,8 +772,6 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
     
     # 13. Agreement Term Changes
     if 'term' in title_lower and 'terminat' not in title_lower:
-        old_years = extract_years(old_text)
-        new_years = extract_years(new_text)
         if old_years != 999 and new_years != 999 and new_years > old_years:
             return ("Medium", f"Agreement term extended from {old_years} to {new_years} years")
     
@@ -522,8 +785,9 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
     
     is_high_risk_clause = any(keyword in title_lower for keyword in high_risk_keywords)
     
-    # Calculate similarity
-    similarity = calculate_similarity(old_text, new_text)
+    # Calculate similarity (unless the caller already has it)
+    if similarity is None:
+        similarity = calculate_similarity(old_text, new_text)
     
     # Determine severity based on similarity and clause type
     if similarity < 0.4 and is_high_risk_clause:
@@ -538,14 +802,28 @@ def detect_risk_patterns(old_text: str, new_text: str, clause_title: str) -> Tup
         return ("Low", "Minimal change")
 
 
+# Report for identical contracts; returned without segmenting or matching
+_IDENTICAL_REPORT = {
+    "riskScore": 0,
+    "summary": "No changes detected. The two contracts are identical.",
+    "verdict": "Identical",
+    "riskReport": "No risks identified.",
+    "diffs": []
+}
+
+
 def generate_diff_report(text_a: str, text_b: str) -> Dict:
     """
     Generate comprehensive diff report with ENHANCED accuracy.
     Returns structured report with diffs, risk scores, summary, and metadata.
     """
+    # Identical contracts have no changes, so skip segmentation and matching
+    if text_a == text_b:
+        return {**_IDENTICAL_REPORT, "diffs": []}
+    
     # Segment both contracts into clauses
-    clauses_a = segment_clauses(text_a)
-    clauses_b = segment_clauses(text_b)
+    clauses_a = _segment_clauses(text_a)
+    clauses_b = _segment_clauses(text_b)
     
     # Match clauses between contracts
     matches = match_clauses(clauses_a, clauses_b)
@@ -563,7 +841,8 @@ def generate_diff_report(text_a: str, text_b: str) -> Dict:
             severity, risk_type = detect_risk_patterns(
                 clause_a["content"],
                 clause_b["content"],
-                clause_a["title"] or clause_b["title"]
+                clause_a["title"] or clause_b["title"],
+                similarity
             )
             
             risk_counters[severity] += 1
@@ -637,12 +916,10 @@ def determine_removal_severity(title: str, content: str) -> str:
     title_lower = title.lower()
     content_lower = content.lower()
     
-    critical_keywords = ['confidential', 'liability', 'indemnif', 'intellectual property', 'warranty']
-    if any(kw in title_lower or kw in content_lower for kw in critical_keywords):
+    if _REMOVAL_CRITICAL_RE.search(title_lower) or _REMOVAL_CRITICAL_RE.search(content_lower):
         return "High"
     
-    important_keywords = ['termination', 'payment', 'dispute', 'governing law']
-    if any(kw in title_lower or kw in content_lower for kw in important_keywords):
+    if _REMOVAL_IMPORTANT_RE.search(title_lower) or _REMOVAL_IMPORTANT_RE.search(content_lower):
         return "Medium"
     
     return "Low"
@@ -657,46 +934,46 @@ def determine_addition_severity(title: str, content: str) -> str:
     if 'non-compete' in title_lower or 'non compete' in content_lower:
         return "High"
     
-    critical_keywords = ['liability', 'indemnif', 'penalty', 'liquidated damages']
-    if any(kw in title_lower or kw in content_lower for kw in critical_keywords):
+    if _ADDITION_CRITICAL_RE.search(title_lower) or _ADDITION_CRITICAL_RE.search(content_lower):
         return "High"
     
-    important_keywords = ['confidential', 'termination', 'obligation', 'restriction']
-    if any(kw in title_lower or kw in content_lower for kw in important_keywords):
+    if _ADDITION_IMPORTANT_RE.search(title_lower) or _ADDITION_IMPORTANT_RE.search(content_lower):
         return "Medium"
     
     return "Low"
 
 
+# Clause-type weights for risk scoring (as per requirements)
+CLAUSE_WEIGHTS = {
+    "liability": 1.5,
+    "indemnif": 1.5,
+    "intellectual property": 1.4,
+    "ip rights": 1.4,
+    "copyright": 1.4,
+    "patent": 1.4,
+    "governing law": 1.3,
+    "jurisdiction": 1.3,
+    "payment": 1.2,
+    "compensation": 1.2,
+    "fee": 1.2,
+    "scope of work": 1.0,
+    "deliverable": 1.0,
+    "confidential": 1.0,
+    "termination": 0.8,
+    "notice": 0.8
+}
+
+# Base risk points per severity
+SEVERITY_BASE_POINTS = {
+    "High": 18,
+    "Medium": 10,
+    "Low": 3
+}
+
+
 def calculate_refined_risk_score(risk_counters: Dict, diffs: List[Dict]) -> int:
     """Calculate risk score with refined algorithm and clause-type weights (0-100 scale)"""
-    
-    # Clause-type weights (as per requirements)
-    CLAUSE_WEIGHTS = {
-        "liability": 1.5,
-        "indemnif": 1.5,
-        "intellectual property": 1.4,
-        "ip rights": 1.4,
-        "copyright": 1.4,
-        "patent": 1.4,
-        "governing law": 1.3,
-        "jurisdiction": 1.3,
-        "payment": 1.2,
-        "compensation": 1.2,
-        "fee": 1.2,
-        "scope of work": 1.0,
-        "deliverable": 1.0,
-        "confidential": 1.0,
-        "termination": 0.8,
-        "notice": 0.8
-    }
-    
-    # Base points per severity
-    base_points = {
-        "High": 18,
-        "Medium": 10,
-        "Low": 3
-    }
+    base_points = SEVERITY_BASE_POINTS
     
     total_risk = 0
     
@@ -0,0 +1,73 @@
+# services/groq_client.py
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from groq import Groq, AsyncGroq, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+# Connection pool shared by every Groq call (comparisons and explanations);
+# comfortably above LLM_MAX_CONCURRENCY so concurrent requests don't queue for a socket
+GROQ_CONNECTION_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+
+_client: Optional[Groq] = None
+_client_key: Optional[str] = None
+
+# Async connection pools are bound to the loop that created them, so there is
+# one (api_key, client) per event loop. A client's connections keep its loop
+# alive, so whoever owns the loop must call close_async_groq_client before
+# shutting it down (the app lifespan, or the end of an asyncio.run)
+_async_clients: Dict[asyncio.AbstractEventLoop, Tuple[str, AsyncGroq]] = {}
+_lock = threading.Lock()
+
+
+def get_groq_client(api_key: str) -> Groq:
+    """Return the shared Groq client, creating it on first use (or if the key changed)"""
+    global _client, _client_key
+
+    with _lock:
+        if _client is not None and _client_key == api_key:
+            return _client
+        old_client = _client
+        _client = Groq(
+            api_key=api_key,
+            http_client=DefaultHttpxClient(limits=GROQ_CONNECTION_LIMITS)
+        )
+        _client_key = api_key
+        client = _client
+
+    # Release the replaced client's connection pool
+    if old_client is not None:
+        old_client.close()
+    return client
+
+
+async def get_async_groq_client(api_key: str) -> AsyncGroq:
+    """Return the shared AsyncGroq client for the running event loop"""
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        entry = _async_clients.get(loop)
+        if entry is not None and entry[0] == api_key:
+            return entry[1]
+        client = AsyncGroq(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(limits=GROQ_CONNECTION_LIMITS)
+        )
+        _async_clients[loop] = (api_key, client)
+
+    # Release the replaced client's connection pool
+    if entry is not None:
+        await entry[1].close()
+    return client
+
+
+async def close_async_groq_client() -> None:
+    """Close and forget the running event loop's AsyncGroq client, if it has one"""
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        entry = _async_clients.pop(loop, None)
+
+    if entry is not None:
+        await entry[1].close()
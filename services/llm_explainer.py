@@ -1,7 +1,13 @@
 import os
 import json
-from typing import Dict
-from groq import Groq
+import re
+import asyncio
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from services.groq_client import get_groq_client, get_async_groq_client, close_async_groq_client
 
 SYSTEM_PROMPT = """You are an assistant that explains contract clause differences in plain English to non-lawyers. For each diff, produce:
 1) A 1-3 sentence explanation of why the change matters.
@@ -9,6 +15,64 @@ SYSTEM_PROMPT = """You are an assistant that explains contract clause difference
 3) A short confidence estimate as a percentage.
 Return JSON object: {"explanation":"...", "suggestions":["...","..."], "confidence":90}"""
 
+BATCH_SYSTEM_PROMPT = """You are an assistant that explains contract clause differences in plain English to non-lawyers. You will receive several numbered diffs. For each diff, produce:
+1) A 1-3 sentence explanation of why the change matters.
+2) Two suggested negotiation lines the user can propose (short).
+3) A short confidence estimate as a percentage.
+Return JSON object: {"results":[{"id":1, "explanation":"...", "suggestions":["...","..."], "confidence":90}, ...]} with exactly one entry per diff id."""
+
+# Trigger phrases looked for in the diff summary. The lookahead reports every
+# occurrence, including overlapping ones, in a single scan.
+_SUMMARY_TRIGGERS = (
+    'confidentiality period', 'termination', 'payment', 'liability', 'non-compete',
+    'governing law', 'dispute', 'arbitration', 'litigation', 'attorney', 'fee',
+    'agreement term', 'reduced', 'increased', 'unlimited', 'removed', 'extended'
+)
+_SUMMARY_TRIGGER_RE = re.compile('(?=(' + '|'.join(map(re.escape, _SUMMARY_TRIGGERS)) + '))')
+
+# Generic topic keywords in old clause text; group number = template priority
+_GENERIC_TOPIC_RE = re.compile(r'(confidential)|(payment|fee)|(liabilit|indemnif)|(terminat)')
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Maximum number of LLM explanation requests in flight at once
+LLM_MAX_CONCURRENCY = 10
+
+# Diffs explained together in one LLM request by the async enhance path
+LLM_BATCH_SIZE = 10
+
+# Only diffs at these severities, with more than this much clause text, go to the LLM
+LLM_SEVERITIES = ('High', 'Medium')
+LLM_MIN_TEXT_CHARS = 40
+
+# Successful LLM explanations, keyed by the prompt inputs (shared by sync and async paths)
+_LLM_CACHE_SIZE = 1024
+_LLM_CACHE: "OrderedDict[tuple, Dict]" = OrderedDict()
+_LLM_CACHE_LOCK = threading.Lock()
+
+
+def _llm_cache_key(old_text: str, new_text: str, severity: str, summary: str) -> tuple:
+    """The prompt only sees the first 1000 chars of each clause, so key the cache on that"""
+    return (old_text[:1000], new_text[:1000], severity, summary)
+
+
+def _llm_cache_get(key: tuple) -> Optional[Dict]:
+    """Return a cached LLM explanation, or None"""
+    with _LLM_CACHE_LOCK:
+        result = _LLM_CACHE.get(key)
+        if result is not None:
+            _LLM_CACHE.move_to_end(key)
+        return result
+
+
+def _llm_cache_put(key: tuple, result: Dict) -> None:
+    """Cache an LLM explanation, evicting the least recently used entry when full"""
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE[key] = result
+        _LLM_CACHE.move_to_end(key)
+        if len(_LLM_CACHE) > _LLM_CACHE_SIZE:
+            _LLM_CACHE.popitem(last=False)
+
 
 def get_llm_explanation(old_text: str, new_text: str, severity: str, summary: str = "") -> Dict:
     """
@@ -20,260 +84,513 @@ def get_llm_explanation(old_text: str, new_text: str, severity: str, summary: st
     if not api_key:
         return get_template_explanation(old_text, new_text, severity, summary)
     
+    cache_key = _llm_cache_key(old_text, new_text, severity, summary)
+    
     try:
-        client = Groq(api_key=api_key)
+        result = _llm_cache_get(cache_key)
+        if result is None:
+            stream = get_groq_client(api_key).chat.completions.create(
+                **_build_llm_request(*cache_key), stream=True
+            )
+            content = ""
+            with stream:
+                for chunk in stream:
+                    content, complete = _append_stream_chunk(content, chunk)
+                    if complete:
+                        break
+            result = _parse_llm_explanation(content)
+            _llm_cache_put(cache_key, result)
+        return _copy_explanation(result)
         
-        user_prompt = f"""Old clause:
-{old_text[:1000]}
+    except Exception as e:
+        print(f"LLM explanation failed: {str(e)}")
+        return get_template_explanation(old_text, new_text, severity, summary)
+
+
+async def aget_llm_explanation(old_text: str, new_text: str, severity: str, summary: str = "") -> Dict:
+    """
+    Async version of get_llm_explanation using AsyncGroq.
+    Falls back to template-based explanation if LLM unavailable.
+    """
+    api_key = os.getenv("GROQ_API_KEY")
+    
+    if not api_key:
+        return get_template_explanation(old_text, new_text, severity, summary)
+    
+    cache_key = _llm_cache_key(old_text, new_text, severity, summary)
+    
+    try:
+        result = _llm_cache_get(cache_key)
+        if result is None:
+            client = await get_async_groq_client(api_key)
+            stream = await client.chat.completions.create(
+                **_build_llm_request(*cache_key), stream=True
+            )
+            content = ""
+            async with stream:
+                async for chunk in stream:
+                    content, complete = _append_stream_chunk(content, chunk)
+                    if complete:
+                        break
+            result = _parse_llm_explanation(content)
+            _llm_cache_put(cache_key, result)
+        return _copy_explanation(result)
+        
+    except Exception as e:
+        print(f"LLM explanation failed: {str(e)}")
+        return get_template_explanation(old_text, new_text, severity, summary)
+
+
+def _build_llm_request(old_text: str, new_text: str, severity: str, summary: str) -> Dict:
+    """Build the chat completion arguments for one explanation"""
+    user_prompt = f"""Old clause:
+{old_text}
 
 New clause:
-{new_text[:1000]}
+{new_text}
 
 Change detected: {summary}
 Severity: {severity}
 
 Provide explanation/suggestions JSON."""
-        
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Try to parse JSON from response
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(content)
-        
-        return {
-            "explanation": result.get("explanation", ""),
-            "suggestions": result.get("suggestions", []),
-            "confidence": result.get("confidence", 85)
-        }
-        
-    except Exception as e:
-        print(f"LLM explanation failed: {str(e)}")
-        return get_template_explanation(old_text, new_text, severity, summary)
+    
+    return {
+        "model": "llama-3.3-70b-versatile",
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 500
+    }
+
+
+def _build_llm_batch_request(items: List[tuple]) -> Dict:
+    """Build the chat completion arguments for explaining several diffs at once"""
+    diff_prompts = [
+        f"""Diff {number}:
+Old clause:
+{old_text}
+
+New clause:
+{new_text}
+
+Change detected: {summary}
+Severity: {severity}"""
+        for number, (old_text, new_text, severity, summary) in enumerate(items, 1)
+    ]
+    user_prompt = "\n\n---\n\n".join(diff_prompts) + "\n\nProvide explanation/suggestions JSON for every diff."
+    
+    return {
+        "model": "llama-3.3-70b-versatile",
+        "messages": [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 500 * len(items),
+        "response_format": {"type": "json_object"}
+    }
+
+
+def _append_stream_chunk(content: str, chunk) -> Tuple[str, bool]:
+    """
+    Append a streamed completion chunk to the content received so far.
+    Also reports whether the content now holds a complete JSON object, so the
+    caller can stop reading instead of waiting for any trailing prose.
+    """
+    delta = chunk.choices[0].delta.content if chunk.choices else None
+    if not delta:
+        return content, False
+    
+    content += delta
+    # An object can only have just completed if this chunk closed a brace
+    if "}" not in delta:
+        return content, False
+    
+    start = content.find("{")
+    if start == -1:
+        return content, False
+    try:
+        _JSON_DECODER.raw_decode(content, start)
+    except ValueError:
+        return content, False
+    return content, True
+
+
+def _parse_llm_explanation(content: str) -> Dict:
+    """Parse the explanation JSON from an LLM response; raises if there is none"""
+    # Decode the first JSON object in place; skips markdown fences or prose around it
+    start = content.find("{")
+    if start == -1:
+        raise ValueError("LLM response contains no JSON object")
+    result, _ = _JSON_DECODER.raw_decode(content, start)
+    
+    return _explanation_from_json(result)
+
+
+def _parse_llm_batch_explanations(content: str, count: int) -> List[Optional[Dict]]:
+    """
+    Parse a batched explanation response into one entry per diff, in prompt order.
+    Diffs the model skipped (or answered malformed) come back as None.
+    """
+    start = content.find("{")
+    if start == -1:
+        raise ValueError("LLM response contains no JSON object")
+    parsed, _ = _JSON_DECODER.raw_decode(content, start)
+    
+    explanations: List[Optional[Dict]] = [None] * count
+    for item in parsed.get("results", []):
+        if not isinstance(item, dict) or not item.get("explanation"):
+            continue
+        try:
+            index = int(item.get("id")) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < count:
+            explanations[index] = _explanation_from_json(item)
+    return explanations
+
+
+def _explanation_from_json(result: Dict) -> Dict:
+    """Normalize one explanation object returned by the LLM"""
+    return {
+        "explanation": result.get("explanation", ""),
+        "suggestions": result.get("suggestions", []),
+        "confidence": result.get("confidence", 85)
+    }
+
+
+def _copy_explanation(explanation_data: Dict) -> Dict:
+    """Copy a cached explanation so callers can't mutate the cached entry"""
+    copied = dict(explanation_data)
+    if "suggestions" in copied:
+        copied["suggestions"] = list(copied["suggestions"])
+    return copied
 
 
 def get_template_explanation(old_text: str, new_text: str, severity: str, summary: str = "") -> Dict:
     """
     Generate template-based explanation with improved context awareness.
     """
-    old_lower = old_text.lower()
-    new_lower = new_text.lower()
-    summary_lower = summary.lower()
+    return _copy_explanation(_template_explanation(old_text, new_text, severity, summary))
+
+
+# Template explanations; shared constants, copied before being handed to callers
+_EXPL_CONFIDENTIALITY_REDUCED = {
+    "explanation": "Significantly reducing the confidentiality period weakens long-term protection of trade secrets and proprietary information. This change could allow the receiving party to disclose sensitive information much sooner, potentially to competitors or in future business dealings.",
+    "suggestions": (
+        "Request restoration of the original 5-year confidentiality period with justification for any reduction",
+        "At minimum, negotiate a 3-year period with enhanced protections for core trade secrets"
+    ),
+    "confidence": 95
+}
+
+_EXPL_TERMINATION_NOTICE_REDUCED = {
+    "explanation": "Shortening the termination notice period reduces your flexibility to exit the agreement and may force rushed transitions. This could lead to business disruption, penalty payments, or difficulty finding alternative arrangements in time.",
+    "suggestions": (
+        "Restore the original 60-day notice period to allow adequate transition time",
+        "If shorter notice is accepted, negotiate penalty-free early termination rights"
+    ),
+    "confidence": 92
+}
+
+_EXPL_PAYMENT_INCREASED = {
+    "explanation": "The payment amount has been significantly increased, directly impacting your budget. Combined with a shorter payment deadline, this creates cash flow pressure and financial risk. The addition of late payment penalties further compounds the financial exposure.",
+    "suggestions": (
+        "Request the original payment amount and timeline, or phase payments based on deliverables",
+        "If increase is accepted, negotiate removal of late payment penalties and extend deadline to 30 days"
+    ),
+    "confidence": 95
+}
+
+_EXPL_LIABILITY_CAP_REMOVED = {
+    "explanation": "Removing the liability cap or introducing unlimited liability for certain breaches exposes your company to potentially catastrophic financial risk. A breach claim could exceed your insurance coverage and threaten business viability. Industry standard is to cap liability at 1-2x the contract value.",
+    "suggestions": (
+        "Reinstate a liability cap at 1-2x total fees paid under the agreement",
+        "If unlimited liability is required, limit it strictly to fraud, willful misconduct, and gross negligence only"
+    ),
+    "confidence": 98
+}
+
+_EXPL_NON_COMPETE_ADDED = {
+    "explanation": "A new non-compete restriction severely limits your business operations and market opportunities. This could prevent you from serving existing clients, hiring talent, or pursuing legitimate business activities in your core market. Non-competes are often unenforceable depending on jurisdiction.",
+    "suggestions": (
+        "Request complete removal of the non-compete clause as overly restrictive",
+        "If required, limit scope to specific products/services directly competitive with disclosed confidential information, and reduce duration to 6-12 months"
+    ),
+    "confidence": 96
+}
+
+_EXPL_GOVERNING_LAW_CHANGED = {
+    "explanation": "Changing the governing law jurisdiction affects which state's laws will interpret the contract. Different states have varying standards for contract enforcement, non-compete validity, and liability limits. This change may make certain clauses more or less favorable.",
+    "suggestions": (
+        "Maintain original jurisdiction if you have established legal counsel there",
+        "If change is accepted, ensure your legal team reviews all provisions under the new state's laws"
+    ),
+    "confidence": 88
+}
+
+_EXPL_DISPUTE_RESOLUTION_CHANGED = {
+    "explanation": "Changing from arbitration to court litigation typically increases costs, extends timelines, and makes proceedings public record. However, litigation does preserve appeal rights. The jurisdiction change may also affect convenience and costs of dispute resolution.",
+    "suggestions": (
+        "Maintain arbitration for cost efficiency and confidentiality",
+        "If litigation is accepted, ensure jurisdiction is mutually convenient and specify venue clearly"
+    ),
+    "confidence": 85
+}
+
+_EXPL_ATTORNEY_FEES_CHANGED = {
+    "explanation": "Removing the prevailing party fee recovery clause means you'll bear your own legal costs even if you win a dispute. This can discourage enforcement of your rights and makes defending frivolous claims more expensive.",
+    "suggestions": (
+        "Restore prevailing party fee recovery to deter frivolous claims",
+        "Alternatively, negotiate a loser-pays provision for bad faith claims only"
+    ),
+    "confidence": 82
+}
+
+_EXPL_TERM_EXTENDED = {
+    "explanation": "Extending the agreement term increases your commitment period. Combined with shorter termination notice, this reduces your flexibility to exit if circumstances change or better opportunities arise.",
+    "suggestions": (
+        "Maintain the original 2-year term with option to renew",
+        "If extension is accepted, ensure termination for convenience rights with reasonable notice"
+    ),
+    "confidence": 80
+}
+
+_EXPL_GENERIC_CONFIDENTIALITY = {
+    "explanation": "Changes to confidentiality terms affect how long you must protect sensitive information and what obligations apply. Ensure changes are balanced and protect your own confidential information equally.",
+    "suggestions": (
+        "Verify confidentiality obligations are mutual and reciprocal",
+        "Ensure adequate protection period for your most sensitive trade secrets"
+    ),
+    "confidence": 80
+}
+
+_EXPL_GENERIC_PAYMENT = {
+    "explanation": "Payment term changes directly impact your financial obligations and cash flow. Review total cost, payment schedule, and any penalties carefully against the value received.",
+    "suggestions": (
+        "Request milestone-based payments tied to deliverables",
+        "Negotiate payment terms that align with your budget cycles"
+    ),
+    "confidence": 85
+}
+
+_EXPL_GENERIC_LIABILITY = {
+    "explanation": "Liability and indemnification clauses determine your financial exposure if something goes wrong. Changes here can significantly increase risk. Ensure liability is capped and mutual where appropriate.",
+    "suggestions": (
+        "Propose mutual liability caps equal to fees paid",
+        "Ensure liability is limited to direct damages, excluding consequential damages"
+    ),
+    "confidence": 88
+}
+
+_EXPL_GENERIC_TERMINATION = {
+    "explanation": "Termination clauses affect your ability to exit the agreement. Ensure you have adequate notice periods and termination rights that protect your flexibility.",
+    "suggestions": (
+        "Request mutual termination rights with equal notice periods",
+        "Ensure termination for convenience is available, not just for cause"
+    ),
+    "confidence": 82
+}
+
+_EXPL_GENERIC_HIGH = {
+    "explanation": "This is a significant change to an important contract term. The modified language could materially affect your rights, obligations, or risk exposure. Thorough legal review and negotiation is strongly recommended before proceeding.",
+    "suggestions": (
+        "Request detailed business justification for this material change",
+        "Consider reverting to original language or proposing compromise alternatives"
+    ),
+    "confidence": 75
+}
+
+_EXPL_GENERIC_MEDIUM = {
+    "explanation": "This change modifies terms in a way that could affect your obligations or rights. While not critical, review is needed to ensure the new language aligns with your business needs and doesn't create unintended consequences.",
+    "suggestions": (
+        "Request examples of how this clause would apply in practical scenarios",
+        "Propose clarifying language that addresses concerns of both parties"
+    ),
+    "confidence": 70
+}
+
+_EXPL_GENERIC_LOW = {
+    "explanation": "This appears to be a minor wording clarification that likely doesn't materially affect the substance of the agreement. However, review to confirm your interpretation matches the other party's intent.",
+    "suggestions": (
+        "Accept if the meaning remains substantially the same after careful review",
+        "Request clarification for any ambiguous language to prevent future disputes"
+    ),
+    "confidence": 65
+}
+
+
+@lru_cache(maxsize=1024)
+def _template_explanation(old_text: str, new_text: str, severity: str, summary: str) -> Dict:
+    """Memoized template lookup; a report often repeats the same kind of change"""
+    summary_terms = {m.group(1) for m in _SUMMARY_TRIGGER_RE.finditer(summary.lower())}
     
     # Confidentiality period changes
-    if 'confidentiality period' in summary_lower and 'reduced' in summary_lower:
-        return {
-            "explanation": "Significantly reducing the confidentiality period weakens long-term protection of trade secrets and proprietary information. This change could allow the receiving party to disclose sensitive information much sooner, potentially to competitors or in future business dealings.",
-            "suggestions": [
-                "Request restoration of the original 5-year confidentiality period with justification for any reduction",
-                "At minimum, negotiate a 3-year period with enhanced protections for core trade secrets"
-            ],
-            "confidence": 95
-        }
+    if 'confidentiality period' in summary_terms and 'reduced' in summary_terms:
+        return _EXPL_CONFIDENTIALITY_REDUCED
     
     # Termination notice changes
-    if 'termination' in summary_lower and 'reduced' in summary_lower:
-        return {
-            "explanation": "Shortening the termination notice period reduces your flexibility to exit the agreement and may force rushed transitions. This could lead to business disruption, penalty payments, or difficulty finding alternative arrangements in time.",
-            "suggestions": [
-                "Restore the original 60-day notice period to allow adequate transition time",
-                "If shorter notice is accepted, negotiate penalty-free early termination rights"
-            ],
-            "confidence": 92
-        }
+    if 'termination' in summary_terms and 'reduced' in summary_terms:
+        return _EXPL_TERMINATION_NOTICE_REDUCED
     
     # Payment increases
-    if 'payment' in summary_lower and 'increased' in summary_lower:
-        return {
-            "explanation": "The payment amount has been significantly increased, directly impacting your budget. Combined with a shorter payment deadline, this creates cash flow pressure and financial risk. The addition of late payment penalties further compounds the financial exposure.",
-            "suggestions": [
-                "Request the original payment amount and timeline, or phase payments based on deliverables",
-                "If increase is accepted, negotiate removal of late payment penalties and extend deadline to 30 days"
-            ],
-            "confidence": 95
-        }
+    if 'payment' in summary_terms and 'increased' in summary_terms:
+        return _EXPL_PAYMENT_INCREASED
     
     # Liability cap removal
-    if 'liability' in summary_lower and ('unlimited' in summary_lower or 'removed' in summary_lower):
-        return {
-            "explanation": "Removing the liability cap or introducing unlimited liability for certain breaches exposes your company to potentially catastrophic financial risk. A breach claim could exceed your insurance coverage and threaten business viability. Industry standard is to cap liability at 1-2x the contract value.",
-            "suggestions": [
-                "Reinstate a liability cap at 1-2x total fees paid under the agreement",
-                "If unlimited liability is required, limit it strictly to fraud, willful misconduct, and gross negligence only"
-            ],
-            "confidence": 98
-        }
+    if 'liability' in summary_terms and ('unlimited' in summary_terms or 'removed' in summary_terms):
+        return _EXPL_LIABILITY_CAP_REMOVED
     
     # Non-compete addition
-    if 'non-compete' in summary_lower:
-        return {
-            "explanation": "A new non-compete restriction severely limits your business operations and market opportunities. This could prevent you from serving existing clients, hiring talent, or pursuing legitimate business activities in your core market. Non-competes are often unenforceable depending on jurisdiction.",
-            "suggestions": [
-                "Request complete removal of the non-compete clause as overly restrictive",
-                "If required, limit scope to specific products/services directly competitive with disclosed confidential information, and reduce duration to 6-12 months"
-            ],
-            "confidence": 96
-        }
+    if 'non-compete' in summary_terms:
+        return _EXPL_NON_COMPETE_ADDED
     
     # Governing law changes
-    if 'governing law' in summary_lower:
-        return {
-            "explanation": "Changing the governing law jurisdiction affects which state's laws will interpret the contract. Different states have varying standards for contract enforcement, non-compete validity, and liability limits. This change may make certain clauses more or less favorable.",
-            "suggestions": [
-                "Maintain original jurisdiction if you have established legal counsel there",
-                "If change is accepted, ensure your legal team reviews all provisions under the new state's laws"
-            ],
-            "confidence": 88
-        }
+    if 'governing law' in summary_terms:
+        return _EXPL_GOVERNING_LAW_CHANGED
     
     # Dispute resolution changes
-    if 'dispute' in summary_lower or 'arbitration' in summary_lower or 'litigation' in summary_lower:
-        return {
-            "explanation": "Changing from arbitration to court litigation typically increases costs, extends timelines, and makes proceedings public record. However, litigation does preserve appeal rights. The jurisdiction change may also affect convenience and costs of dispute resolution.",
-            "suggestions": [
-                "Maintain arbitration for cost efficiency and confidentiality",
-                "If litigation is accepted, ensure jurisdiction is mutually convenient and specify venue clearly"
-            ],
-            "confidence": 85
-        }
+    if 'dispute' in summary_terms or 'arbitration' in summary_terms or 'litigation' in summary_terms:
+        return _EXPL_DISPUTE_RESOLUTION_CHANGED
     
     # Attorney fees changes
-    if 'attorney' in summary_lower or 'fee' in summary_lower:
-        return {
-            "explanation": "Removing the prevailing party fee recovery clause means you'll bear your own legal costs even if you win a dispute. This can discourage enforcement of your rights and makes defending frivolous claims more expensive.",
-            "suggestions": [
-                "Restore prevailing party fee recovery to deter frivolous claims",
-                "Alternatively, negotiate a loser-pays provision for bad faith claims only"
-            ],
-            "confidence": 82
-        }
+    if 'attorney' in summary_terms or 'fee' in summary_terms:
+        return _EXPL_ATTORNEY_FEES_CHANGED
     
     # Agreement term extension
-    if 'agreement term' in summary_lower and 'extended' in summary_lower:
-        return {
-            "explanation": "Extending the agreement term increases your commitment period. Combined with shorter termination notice, this reduces your flexibility to exit if circumstances change or better opportunities arise.",
-            "suggestions": [
-                "Maintain the original 2-year term with option to renew",
-                "If extension is accepted, ensure termination for convenience rights with reasonable notice"
-            ],
-            "confidence": 80
-        }
+    if 'agreement term' in summary_terms and 'extended' in summary_terms:
+        return _EXPL_TERM_EXTENDED
+    
+    # Generic topics: one scan of the old text, branches keep their priority order.
+    # Clause texts are only lowercased once the summary-based templates missed.
+    old_topics = {m.lastindex for m in _GENERIC_TOPIC_RE.finditer(old_text.lower())}
     
     # Generic confidentiality
-    if 'confidential' in old_lower or 'confidential' in new_lower:
-        return {
-            "explanation": "Changes to confidentiality terms affect how long you must protect sensitive information and what obligations apply. Ensure changes are balanced and protect your own confidential information equally.",
-            "suggestions": [
-                "Verify confidentiality obligations are mutual and reciprocal",
-                "Ensure adequate protection period for your most sensitive trade secrets"
-            ],
-            "confidence": 80
-        }
+    if 1 in old_topics or 'confidential' in new_text.lower():
+        return _EXPL_GENERIC_CONFIDENTIALITY
     
     # Generic payment
-    if 'payment' in old_lower or 'fee' in old_lower:
-        return {
-            "explanation": "Payment term changes directly impact your financial obligations and cash flow. Review total cost, payment schedule, and any penalties carefully against the value received.",
-            "suggestions": [
-                "Request milestone-based payments tied to deliverables",
-                "Negotiate payment terms that align with your budget cycles"
-            ],
-            "confidence": 85
-        }
+    if 2 in old_topics:
+        return _EXPL_GENERIC_PAYMENT
     
     # Generic liability
-    if 'liabilit' in old_lower or 'indemnif' in old_lower:
-        return {
-            "explanation": "Liability and indemnification clauses determine your financial exposure if something goes wrong. Changes here can significantly increase risk. Ensure liability is capped and mutual where appropriate.",
-            "suggestions": [
-                "Propose mutual liability caps equal to fees paid",
-                "Ensure liability is limited to direct damages, excluding consequential damages"
-            ],
-            "confidence": 88
-        }
+    if 3 in old_topics:
+        return _EXPL_GENERIC_LIABILITY
     
     # Generic termination
-    if 'terminat' in old_lower:
-        return {
-            "explanation": "Termination clauses affect your ability to exit the agreement. Ensure you have adequate notice periods and termination rights that protect your flexibility.",
-            "suggestions": [
-                "Request mutual termination rights with equal notice periods",
-                "Ensure termination for convenience is available, not just for cause"
-            ],
-            "confidence": 82
-        }
+    if 4 in old_topics:
+        return _EXPL_GENERIC_TERMINATION
     
     # Generic high severity
     if severity == "High":
-        return {
-            "explanation": "This is a significant change to an important contract term. The modified language could materially affect your rights, obligations, or risk exposure. Thorough legal review and negotiation is strongly recommended before proceeding.",
-            "suggestions": [
-                "Request detailed business justification for this material change",
-                "Consider reverting to original language or proposing compromise alternatives"
-            ],
-            "confidence": 75
-        }
+        return _EXPL_GENERIC_HIGH
     
     # Generic medium severity
     if severity == "Medium":
-        return {
-            "explanation": "This change modifies terms in a way that could affect your obligations or rights. While not critical, review is needed to ensure the new language aligns with your business needs and doesn't create unintended consequences.",
-            "suggestions": [
-                "Request examples of how this clause would apply in practical scenarios",
-                "Propose clarifying language that addresses concerns of both parties"
-            ],
-            "confidence": 70
-        }
+        return _EXPL_GENERIC_MEDIUM
     
     # Generic low severity
-    return {
-        "explanation": "This appears to be a minor wording clarification that likely doesn't materially affect the substance of the agreement. However, review to confirm your interpretation matches the other party's intent.",
-        "suggestions": [
-            "Accept if the meaning remains substantially the same after careful review",
-            "Request clarification for any ambiguous language to prevent future disputes"
-        ],
-        "confidence": 65
-    }
+    return _EXPL_GENERIC_LOW
 
 
 def enhance_diffs_with_explanations(diffs: list, use_llm: bool = False) -> list:
     """
     Enhance a list of diffs with LLM or template explanations.
+    Without use_llm every diff gets a template explanation; with it, the diffs go
+    through the batched aenhance_diffs_with_explanations (don't call it from a
+    running event loop in that case).
     Modifies diffs in place and returns the enhanced list.
     """
-    for diff in diffs:
-        old_text = diff.get("oldText", "")
-        new_text = diff.get("newText", "")
-        severity = diff.get("severity", "Low")
-        summary = diff.get("summary", "")
-        
-        if use_llm:
-            explanation_data = get_llm_explanation(old_text, new_text, severity, summary)
-        else:
-            explanation_data = get_template_explanation(old_text, new_text, severity, summary)
-        
-        # Merge explanation data into diff
-        diff["explanation"] = explanation_data["explanation"]
-        if "suggestions" in explanation_data:
-            diff["suggestions"] = explanation_data["suggestions"]
+    if use_llm:
+        async def enhance() -> list:
+            try:
+                return await aenhance_diffs_with_explanations(diffs)
+            finally:
+                # asyncio.run closes this loop next; release the client bound to it
+                await close_async_groq_client()
         
-        # Update confidence if provided and reasonable
-        if "confidence" in explanation_data and explanation_data["confidence"]:
-            # Keep original confidence if it's higher (from similarity calculation)
-            if explanation_data["confidence"] > diff.get("confidence", 0):
-                diff["confidence"] = explanation_data["confidence"]
+        return asyncio.run(enhance())
+    
+    for diff in diffs:
+        _merge_explanation(diff, get_template_explanation(*_explanation_args(diff)))
     
     return diffs
+
+
+async def aenhance_diffs_with_explanations(diffs: list, concurrency: int = LLM_MAX_CONCURRENCY) -> list:
+    """
+    Enhance a list of diffs with LLM explanations, fetched concurrently on the event loop.
+    Diffs are sent in batches of LLM_BATCH_SIZE per request; anything a batch
+    doesn't answer is retried per diff. Low-severity diffs use template explanations.
+    Modifies diffs in place and returns the enhanced list.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    api_key = os.getenv("GROQ_API_KEY")
+    
+    async def explain(args: tuple) -> Dict:
+        if not _worth_llm_explanation(*args):
+            return get_template_explanation(*args)
+        async with semaphore:
+            return await aget_llm_explanation(*args)
+    
+    async def prefetch_batch(batch: List[tuple]) -> None:
+        # Fills the cache so explain() below only calls the LLM for what's missing
+        try:
+            client = await get_async_groq_client(api_key)
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    **_build_llm_batch_request(batch)
+                )
+            explanations = _parse_llm_batch_explanations(response.choices[0].message.content, len(batch))
+        except Exception as e:
+            print(f"Batched LLM explanation failed: {str(e)}")
+            return
+        for cache_key, result in zip(batch, explanations):
+            if result is not None:
+                _llm_cache_put(cache_key, result)
+    
+    explain_args = [_explanation_args(diff) for diff in diffs]
+    
+    # Identical changes share one request instead of racing the cache
+    unique_args = list(dict.fromkeys(explain_args))
+    
+    if api_key:
+        uncached = list(dict.fromkeys(
+            _llm_cache_key(*args) for args in unique_args
+            if _worth_llm_explanation(*args) and _llm_cache_get(_llm_cache_key(*args)) is None
+        ))
+        batches = [uncached[i:i + LLM_BATCH_SIZE] for i in range(0, len(uncached), LLM_BATCH_SIZE)]
+        await asyncio.gather(*(prefetch_batch(batch) for batch in batches if len(batch) > 1))
+    
+    unique_results: List[Dict] = await asyncio.gather(*(explain(args) for args in unique_args))
+    results = dict(zip(unique_args, unique_results))
+    
+    for diff, args in zip(diffs, explain_args):
+        _merge_explanation(diff, _copy_explanation(results[args]))
+    
+    return diffs
+
+
+def _worth_llm_explanation(old_text: str, new_text: str, severity: str, summary: str) -> bool:
+    """Low-severity or near-empty changes are covered well by the templates"""
+    return severity in LLM_SEVERITIES and len(old_text) + len(new_text) > LLM_MIN_TEXT_CHARS
+
+
+def _explanation_args(diff: Dict) -> tuple:
+    """(old_text, new_text, severity, summary) for explaining one diff"""
+    return (diff.get("oldText", ""), diff.get("newText", ""), diff.get("severity", "Low"), diff.get("summary", ""))
+
+
+def _merge_explanation(diff: Dict, explanation_data: Dict) -> None:
+    """Merge explanation data into a diff"""
+    diff["explanation"] = explanation_data["explanation"]
+    if "suggestions" in explanation_data:
+        diff["suggestions"] = explanation_data["suggestions"]
+    
+    # Update confidence if provided and reasonable
+    if "confidence" in explanation_data and explanation_data["confidence"]:
+        # Keep original confidence if it's higher (from similarity calculation)
+        if explanation_data["confidence"] > diff.get("confidence", 0):
+            diff["confidence"] = explanation_data["confidence"]
@@ -1,6 +1,14 @@
+import hashlib
 import io
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pdfminer.high_level import extract_text as pdf_extract_text
 from docx import Document
+from lxml import etree
 from PIL import Image
 
 # Make pytesseract optional
@@ -10,31 +18,86 @@ try:
 except ImportError:
     PYTESSERACT_AVAILABLE = False
 
+# Prefer PDFium (native) for text PDFs; pdfminer stays as the fallback
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# Scanned pages are rasterized at this resolution for OCR (pdf2image defaults to 200)
+OCR_DPI = 200
+OCR_MAX_WORKERS = os.cpu_count() or 1
+
+# Extracted text of recent uploads, keyed by (content digest, extension), so
+# re-submitted files skip PDF parsing/OCR. Bounded by entry count and by the
+# total characters held; least recently used entries are evicted first.
+_TEXT_CACHE_SIZE = 16
+_TEXT_CACHE_MAX_CHARS = 4 * 1024 * 1024
+_TEXT_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_TEXT_CACHE_CHARS = 0
+_TEXT_CACHE_LOCK = threading.Lock()
+
 
 def extract_text_from_file(file_bytes: bytes, filename: str) -> str:
     """
     Extract text from PDF, DOCX, or TXT files.
     Falls back to OCR for scanned PDFs if needed.
     """
-    extension = filename.lower().split('.')[-1]
+    extension = filename.rsplit('.', 1)[-1].lower()
     
     try:
-        if extension == 'pdf':
-            return extract_from_pdf(file_bytes)
-        elif extension in ['docx', 'doc']:
-            return extract_from_docx(file_bytes)
-        elif extension == 'txt':
-            return file_bytes.decode('utf-8', errors='ignore')
-        else:
+        extractor = _EXTRACTORS.get(extension)
+        if extractor is None:
             raise ValueError(f"Unsupported file format: {extension}")
+        
+        cache_key = (hashlib.blake2b(file_bytes, digest_size=16).digest(), extension)
+        with _TEXT_CACHE_LOCK:
+            text = _TEXT_CACHE.get(cache_key)
+            if text is not None:
+                _TEXT_CACHE.move_to_end(cache_key)
+                return text
+        
+        # Only successful extractions reach the cache; errors propagate uncached
+        text = extractor(file_bytes)
+        _text_cache_put(cache_key, text)
+        return text
     except Exception as e:
         raise Exception(f"Error extracting text from {filename}: {str(e)}")
 
 
+def _text_cache_put(cache_key: tuple, text: str) -> None:
+    """Store extracted text, evicting old entries to stay within the cache bounds"""
+    global _TEXT_CACHE_CHARS
+    
+    # A single document bigger than the whole budget isn't worth evicting everything for
+    if len(text) > _TEXT_CACHE_MAX_CHARS:
+        return
+    
+    with _TEXT_CACHE_LOCK:
+        previous = _TEXT_CACHE.pop(cache_key, None)
+        if previous is not None:
+            _TEXT_CACHE_CHARS -= len(previous)
+        _TEXT_CACHE[cache_key] = text
+        _TEXT_CACHE_CHARS += len(text)
+        
+        while len(_TEXT_CACHE) > _TEXT_CACHE_SIZE or _TEXT_CACHE_CHARS > _TEXT_CACHE_MAX_CHARS:
+            _, evicted = _TEXT_CACHE.popitem(last=False)
+            _TEXT_CACHE_CHARS -= len(evicted)
+
+
 def extract_from_pdf(file_bytes: bytes) -> str:
-    """Extract text from PDF using pdfminer.six"""
+    """Extract text from PDF using PDFium if available, else pdfminer.six"""
     try:
-        text = pdf_extract_text(io.BytesIO(file_bytes))
+        text = ""
+        if PDFIUM_AVAILABLE:
+            try:
+                text = extract_from_pdf_pdfium(file_bytes)
+            except Exception as e:
+                print(f"PDFium extraction failed, falling back to pdfminer: {e}")
+        
+        if not text.strip():
+            text = pdf_extract_text(io.BytesIO(file_bytes))
         
         # If extracted text is too short, it might be a scanned PDF
         if len(text.strip()) < 50:
@@ -51,8 +114,45 @@ def extract_from_pdf(file_bytes: bytes) -> str:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
 
+def extract_from_pdf_pdfium(file_bytes: bytes) -> str:
+    """Extract text from PDF using pypdfium2, one page at a time"""
+    pdf = pdfium.PdfDocument(file_bytes)
+    try:
+        pages = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        # PDFium reports CRLF line breaks; match pdfminer's output
+        return "\n".join(pages).replace("\r\n", "\n")
+    finally:
+        pdf.close()
+
+
+# WordprocessingML tags read by the direct DOCX extractor
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY = _W + 'body'
+_W_P = _W + 'p'
+_W_R = _W + 'r'
+_W_HYPERLINK = _W + 'hyperlink'
+_W_T = _W + 't'
+_W_BR = _W + 'br'
+_W_TYPE = _W + 'type'
+_W_RUN_CHARS = {_W + 'tab': '\t', _W + 'ptab': '\t', _W + 'cr': '\n', _W + 'noBreakHyphen': '-'}
+
+# Same settings python-docx parses with (no entity expansion)
+_DOCX_XML_PARSER = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+
+
 def extract_from_docx(file_bytes: bytes) -> str:
     """Extract text from DOCX files"""
+    try:
+        return extract_from_docx_xml(file_bytes)
+    except Exception:
+        pass
+    
+    # Fall back to python-docx for anything the direct reader can't handle
     try:
         doc = Document(io.BytesIO(file_bytes))
         return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
@@ -60,6 +160,39 @@ def extract_from_docx(file_bytes: bytes) -> str:
         raise Exception(f"Failed to extract text from DOCX: {str(e)}")
 
 
+def extract_from_docx_xml(file_bytes: bytes) -> str:
+    """
+    Extract body paragraph text straight from word/document.xml.
+    Produces the same text as python-docx's doc.paragraphs without building its object model.
+    """
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+        root = etree.fromstring(archive.read('word/document.xml'), _DOCX_XML_PARSER)
+    
+    body = root.find(_W_BODY)
+    if body is None:
+        raise ValueError("DOCX has no document body")
+    
+    paragraphs = []
+    for paragraph in body.iterchildren(_W_P):
+        parts = []
+        for item in paragraph.iterchildren(_W_R, _W_HYPERLINK):
+            runs = (item,) if item.tag == _W_R else item.iterchildren(_W_R)
+            for run in runs:
+                for child in run:
+                    tag = child.tag
+                    if tag == _W_T:
+                        parts.append(child.text or '')
+                    elif tag == _W_BR:
+                        # Only line breaks count as text; page/column breaks don't
+                        if child.get(_W_TYPE, 'textWrapping') == 'textWrapping':
+                            parts.append('\n')
+                    elif tag in _W_RUN_CHARS:
+                        parts.append(_W_RUN_CHARS[tag])
+        paragraphs.append(''.join(parts))
+    
+    return '\n'.join(paragraphs)
+
+
 def extract_from_scanned_pdf(file_bytes: bytes) -> str:
     """
     Extract text from scanned PDF using OCR (optional feature).
@@ -69,16 +202,44 @@ def extract_from_scanned_pdf(file_bytes: bytes) -> str:
         raise Exception("OCR support not available. Install pytesseract and pdf2image.")
     
     try:
-        from pdf2image import convert_from_bytes
-        
-        images = convert_from_bytes(file_bytes)
-        text = ""
+        from pdf2image import convert_from_path, pdfinfo_from_path
         
-        for image in images:
-            text += pytesseract.image_to_string(image) + "\n"
+        # Write the PDF once; every page worker rasterizes from the same file
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = os.path.join(temp_dir, "scanned.pdf")
+            with open(pdf_path, "wb") as pdf_file:
+                pdf_file.write(file_bytes)
+            
+            page_count = pdfinfo_from_path(pdf_path)["Pages"]
+            
+            def ocr_page(page_number: int) -> str:
+                # Rasterize one page at a time so only in-flight pages sit in memory
+                image = convert_from_path(
+                    pdf_path, dpi=OCR_DPI, first_page=page_number, last_page=page_number
+                )[0]
+                return pytesseract.image_to_string(image)
+            
+            # Tesseract runs as a subprocess per page, so threads are enough to use every core
+            with ThreadPoolExecutor(max_workers=min(OCR_MAX_WORKERS, page_count) or 1) as executor:
+                pages = executor.map(ocr_page, range(1, page_count + 1))
+                text = "".join(page + "\n" for page in pages)
         
         return text
     except ImportError:
         raise Exception("OCR support requires pdf2image library.")
     except Exception as e:
         raise Exception(f"OCR failed: {str(e)}")
+
+
+def extract_from_txt(file_bytes: bytes) -> str:
+    """Decode plain text files"""
+    return file_bytes.decode('utf-8', errors='ignore')
+
+
+# File extension -> text extractor
+_EXTRACTORS = {
+    'pdf': extract_from_pdf,
+    'docx': extract_from_docx,
+    'doc': extract_from_docx,
+    'txt': extract_from_txt,
+}
@@ -8,35 +8,102 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
 from datetime import datetime
 
-def generate_pdf_report(report_data):
-    """Generate professional PDF report from comparison data"""
-    buffer = BytesIO()
+# Styles are plain configuration, so build them once at import rather than per report
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1e40af'),
+    spaceAfter=30,
+    alignment=TA_CENTER
+)
+
+_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#1f2937'),
+    spaceAfter=12,
+    spaceBefore=12
+)
+
+_CLAUSE_TITLE_STYLE = ParagraphStyle(
+    'ClauseTitle',
+    parent=_STYLES['Heading3'],
+    fontSize=12,
+    textColor=colors.HexColor('#1f2937'),
+    spaceAfter=8
+)
+
+_METADATA_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#6b7280')),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
+_BREAKDOWN_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+])
+
+_SEVERITY_COLORS = {
+    'High': colors.HexColor('#dc2626'),
+    'Medium': colors.HexColor('#f59e0b'),
+    'Low': colors.HexColor('#10b981')
+}
+
+
+def _severity_table_style(severity_color):
+    """Style for a diff's severity badge row"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), severity_color),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ])
+
+
+_SEVERITY_TABLE_STYLES = {
+    severity: _severity_table_style(color) for severity, color in _SEVERITY_COLORS.items()
+}
+_UNKNOWN_SEVERITY_TABLE_STYLE = _severity_table_style(colors.grey)
+
+_FOOTER_TEXT = """
+    <para align=center>
+    <font size=8 color=#6b7280>
+    This report was generated by ClauseCompare™ AI Contract Analysis Platform.<br/>
+    For questions or support, visit clausecompare.com<br/>
+    © 2025 ClauseCompare. All rights reserved.
+    </font>
+    </para>
+    """
+
+
+def generate_pdf_report(report_data, out_stream=None):
+    """
+    Generate professional PDF report from comparison data.
+    Writes into out_stream (any binary file-like) and returns it when given;
+    otherwise returns the PDF as bytes.
+    """
+    buffer = out_stream if out_stream is not None else BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
     
     story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1e40af'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#1f2937'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
+    styles = _STYLES
     
     # Title
-    story.append(Paragraph("ClauseCompare™ Analysis Report", title_style))
+    story.append(Paragraph("ClauseCompare™ Analysis Report", _TITLE_STYLE))
     story.append(Spacer(1, 0.2*inch))
     
     # Report metadata
@@ -56,19 +123,13 @@ def generate_pdf_report(report_data):
     ]
     
     metadata_table = Table(metadata_data, colWidths=[2*inch, 4.5*inch])
-    metadata_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#6b7280')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    metadata_table.setStyle(_METADATA_TABLE_STYLE)
     story.append(metadata_table)
     story.append(Spacer(1, 0.3*inch))
     
     # Risk score box
     risk_score = report_data.get('risk_score', 0)
-    risk_color = colors.HexColor('#dc2626') if risk_score >= 70 else colors.HexColor('#f59e0b') if risk_score >= 40 else colors.HexColor('#10b981')
+    risk_color = _SEVERITY_COLORS['High'] if risk_score >= 70 else _SEVERITY_COLORS['Medium'] if risk_score >= 40 else _SEVERITY_COLORS['Low']
     
     risk_data = [
         ['OVERALL RISK SCORE'],
@@ -92,14 +153,14 @@ def generate_pdf_report(report_data):
     story.append(Spacer(1, 0.3*inch))
     
     # Executive summary
-    story.append(Paragraph("Executive Summary", heading_style))
+    story.append(Paragraph("Executive Summary", _HEADING_STYLE))
     summary_text = report_data.get('summary', 'No summary available')
     story.append(Paragraph(summary_text, styles['BodyText']))
     story.append(Spacer(1, 0.2*inch))
     
     # Verdict
     if report_data.get('verdict'):
-        story.append(Paragraph("Verdict", heading_style))
+        story.append(Paragraph("Verdict", _HEADING_STYLE))
         story.append(Paragraph(report_data['verdict'], styles['BodyText']))
         story.append(Spacer(1, 0.3*inch))
     
@@ -107,7 +168,7 @@ def generate_pdf_report(report_data):
     metadata = report_data.get('metadata', {})
     type_breakdown = metadata.get('typeBreakdown', {})
     if type_breakdown:
-        story.append(Paragraph("Changes Summary", heading_style))
+        story.append(Paragraph("Changes Summary", _HEADING_STYLE))
         
         breakdown_data = [
             ['Change Type', 'Count'],
@@ -118,42 +179,23 @@ def generate_pdf_report(report_data):
         ]
         
         breakdown_table = Table(breakdown_data, colWidths=[3*inch, 3.5*inch])
-        breakdown_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        breakdown_table.setStyle(_BREAKDOWN_TABLE_STYLE)
         story.append(breakdown_table)
         story.append(PageBreak())
     
     # Detailed changes
     diffs = report_data.get('diffs', [])
     if diffs:
-        story.append(Paragraph("Detailed Clause Analysis", heading_style))
+        story.append(Paragraph("Detailed Clause Analysis", _HEADING_STYLE))
         story.append(Spacer(1, 0.2*inch))
         
         for i, diff in enumerate(diffs[:20], 1):  # Limit to first 20 for reasonable PDF size
             # Clause header
             clause_title = f"{i}. {diff.get('clause', 'Unknown')} - {diff.get('type', 'Modified')}"
-            story.append(Paragraph(clause_title, ParagraphStyle(
-                'ClauseTitle',
-                parent=styles['Heading3'],
-                fontSize=12,
-                textColor=colors.HexColor('#1f2937'),
-                spaceAfter=8
-            )))
+            story.append(Paragraph(clause_title, _CLAUSE_TITLE_STYLE))
             
             # Severity badge
             severity = diff.get('severity', 'Medium')
-            severity_color = {
-                'High': colors.HexColor('#dc2626'),
-                'Medium': colors.HexColor('#f59e0b'),
-                'Low': colors.HexColor('#10b981')
-            }.get(severity, colors.grey)
             
             severity_text = f"{severity} Risk"
             if diff.get('confidence'):
@@ -161,14 +203,7 @@ def generate_pdf_report(report_data):
             
             severity_data = [[severity_text]]
             severity_table = Table(severity_data, colWidths=[6.5*inch])
-            severity_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), severity_color),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            severity_table.setStyle(_SEVERITY_TABLE_STYLES.get(severity, _UNKNOWN_SEVERITY_TABLE_STYLE))
             story.append(severity_table)
             story.append(Spacer(1, 0.1*inch))
             
@@ -197,18 +232,10 @@ def generate_pdf_report(report_data):
     
     # Footer
     story.append(Spacer(1, 0.5*inch))
-    footer_text = """
-    <para align=center>
-    <font size=8 color=#6b7280>
-    This report was generated by ClauseCompare™ AI Contract Analysis Platform.<br/>
-    For questions or support, visit clausecompare.com<br/>
-    © 2025 ClauseCompare. All rights reserved.
-    </font>
-    </para>
-    """
-    story.append(Paragraph(footer_text, styles['BodyText']))
+    story.append(Paragraph(_FOOTER_TEXT, styles['BodyText']))
     
     # Build PDF
     doc.build(story)
-    buffer.seek(0)
+    if out_stream is not None:
+        return out_stream
     return buffer.getvalue()
@@ -0,0 +1,15 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient (and app startup) shared by the whole test session"""
+    # Imported here so tests that don't need the API (and its Supabase
+    # client) can run without database credentials
+    from main import app
+    
+    with TestClient(app) as test_client:
+        # Build the OpenAPI schema once up front instead of on first use
+        app.openapi()
+        yield test_client
@@ -0,0 +1,35 @@
+import pytest
+from services.ai_comparator import extract_json_from_response
+
+
+def test_extract_json_with_leading_text():
+    """Test that prose and markdown fences before the object are skipped"""
+    content = 'Here is the comparison:\n```json\n{"riskScore": 42, "changes": []}\n```'
+    
+    assert extract_json_from_response(content) == {"riskScore": 42, "changes": []}
+
+
+def test_extract_json_with_brace_in_string():
+    """Test that braces inside JSON strings don't end the object early"""
+    content = '{"summary": "Clause {3} was removed }", "nested": {"a": "{"}}'
+    
+    assert extract_json_from_response(content) == {
+        "summary": "Clause {3} was removed }",
+        "nested": {"a": "{"},
+    }
+
+
+def test_extract_json_with_trailing_text():
+    """Test that text after the first complete object is ignored"""
+    content = '{"verdict": "safe"}\n```\nLet me know if you need more detail. {"x": 1}'
+    
+    assert extract_json_from_response(content) == {"verdict": "safe"}
+
+
+def test_extract_json_invalid():
+    """Test that a missing or malformed object raises"""
+    with pytest.raises(Exception, match="AI returned invalid JSON"):
+        extract_json_from_response("No JSON here")
+    
+    with pytest.raises(Exception, match="AI returned invalid JSON"):
+        extract_json_from_response('{"riskScore": 42,')
@@ -1,34 +1,8 @@
-import pytest
-from fastapi.testclient import TestClient
-from main import app
 import io
 
 
-client = TestClient(app)
-
-
-def test_health_endpoint():
-    """Test health check endpoint"""
-    response = client.get("/health")
-    assert response.status_code == 200
-    data = response.json()
-    assert data["status"] == "healthy"
-    assert "timestamp" in data
-
-
-def test_root_endpoint():
-    """Test root endpoint"""
-    response = client.get("/")
-    assert response.status_code == 200
-    data = response.json()
-    assert data["status"] == "healthy"
-    assert data["service"] == "ClauseCompare API"
-
-
-def test_compare_with_text_files():
-    """Test /compare endpoint with simple text files"""
-    # Create sample contract texts
-    contract_a = """
+# Sample contract texts
+CONTRACT_A_BYTES = b"""
 CONFIDENTIALITY AGREEMENT
 
 1. CONFIDENTIAL INFORMATION
@@ -40,8 +14,8 @@ Payment of $10,000 shall be made within 30 days.
 3. TERMINATION
 Either party may terminate with 60 days written notice.
 """
-    
-    contract_b = """
+
+CONTRACT_B_BYTES = b"""
 CONFIDENTIALITY AGREEMENT
 
 1. CONFIDENTIAL INFORMATION
@@ -53,10 +27,36 @@ Payment of $15,000 shall be made within 15 days.
 3. TERMINATION
 Either party may terminate with 30 days written notice.
 """
-    
+
+SIMPLE_CONTRACT_BYTES = b"This is a simple contract with standard terms."
+
+SHORT_CONTRACT_A_BYTES = b"Confidentiality: 5 years"
+SHORT_CONTRACT_B_BYTES = b"Confidentiality: 1 year"
+
+
+def test_health_endpoint(client):
+    """Test health check endpoint"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert "timestamp" in data
+
+
+def test_root_endpoint(client):
+    """Test root endpoint"""
+    response = client.get("/")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert data["service"] == "ClauseCompare API"
+
+
+def test_compare_with_text_files(client):
+    """Test /compare endpoint with simple text files"""
     # Create file-like objects
-    file_a = ("contract_a.txt", io.BytesIO(contract_a.encode()), "text/plain")
-    file_b = ("contract_b.txt", io.BytesIO(contract_b.encode()), "text/plain")
+    file_a = ("contract_a.txt", io.BytesIO(CONTRACT_A_BYTES), "text/plain")
+    file_b = ("contract_b.txt", io.BytesIO(CONTRACT_B_BYTES), "text/plain")
     
     response = client.post(
         "/compare",
@@ -90,12 +90,10 @@ Either party may terminate with 30 days written notice.
         assert "confidence" in diff
 
 
-def test_compare_identical_files():
+def test_compare_identical_files(client):
     """Test comparing identical files returns minimal diffs"""
-    contract = "This is a simple contract with standard terms."
-    
-    file_a = ("contract.txt", io.BytesIO(contract.encode()), "text/plain")
-    file_b = ("contract.txt", io.BytesIO(contract.encode()), "text/plain")
+    file_a = ("contract.txt", io.BytesIO(SIMPLE_CONTRACT_BYTES), "text/plain")
+    file_b = ("contract.txt", io.BytesIO(SIMPLE_CONTRACT_BYTES), "text/plain")
     
     response = client.post(
         "/compare",
@@ -111,7 +109,7 @@ def test_compare_identical_files():
     assert data["riskScore"] == 0 or data["riskScore"] < 10
 
 
-def test_compare_missing_file():
+def test_compare_missing_file(client):
     """Test error handling when file is missing"""
     file_a = ("contract.txt", io.BytesIO(b"test"), "text/plain")
     
@@ -124,7 +122,7 @@ def test_compare_missing_file():
     assert response.status_code == 422  # FastAPI validation error
 
 
-def test_compare_invalid_file_format():
+def test_compare_invalid_file_format(client):
     """Test error handling for invalid file formats"""
     file_a = ("contract.exe", io.BytesIO(b"test"), "application/octet-stream")
     file_b = ("contract.txt", io.BytesIO(b"test"), "text/plain")
@@ -142,7 +140,7 @@ def test_compare_invalid_file_format():
     assert "Invalid file format" in response.json()["detail"]
 
 
-def test_compare_empty_file():
+def test_compare_empty_file(client):
     """Test error handling for empty files"""
     file_a = ("empty.txt", io.BytesIO(b""), "text/plain")
     file_b = ("contract.txt", io.BytesIO(b"Some content"), "text/plain")
@@ -160,13 +158,10 @@ def test_compare_empty_file():
     assert "empty" in response.json()["detail"].lower()
 
 
-def test_compare_with_llm_flag():
+def test_compare_with_llm_flag(client):
     """Test that use_llm parameter is respected"""
-    contract_a = "Confidentiality: 5 years"
-    contract_b = "Confidentiality: 1 year"
-    
-    file_a = ("a.txt", io.BytesIO(contract_a.encode()), "text/plain")
-    file_b = ("b.txt", io.BytesIO(contract_b.encode()), "text/plain")
+    file_a = ("a.txt", io.BytesIO(SHORT_CONTRACT_A_BYTES), "text/plain")
+    file_b = ("b.txt", io.BytesIO(SHORT_CONTRACT_B_BYTES), "text/plain")
     
     response = client.post(
         "/compare",
@@ -180,3 +175,31 @@ def test_compare_with_llm_flag():
     assert response.status_code == 200
     data = response.json()
     assert "llmUsed" in data
+
+
+def test_compare_file_too_large(client, monkeypatch):
+    """Test that files over the upload limit are rejected with 413"""
+    from main import app, get_current_user, UserService, MAX_UPLOAD_SIZE
+    
+    async def fake_usage(user_id):
+        return {"used": 0, "limit": 10, "remaining": 10, "plan": "free"}
+    
+    monkeypatch.setattr(UserService, "get_usage", fake_usage)
+    app.dependency_overrides[get_current_user] = lambda: "test-user"
+    try:
+        file_a = ("big.txt", io.BytesIO(b"x" * (MAX_UPLOAD_SIZE + 1)), "text/plain")
+        file_b = ("contract.txt", io.BytesIO(SIMPLE_CONTRACT_BYTES), "text/plain")
+        
+        response = client.post(
+            "/compare",
+            files={
+                "fileA": file_a,
+                "fileB": file_b
+            },
+            data={"use_llm": "false"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    
+    assert response.status_code == 413
+    assert "fileA too large: 10.0MB" in response.json()["detail"]
@@ -1,7 +1,14 @@
+import random
+
 import pytest
 from services.diff_engine import (
     extract_years, extract_days, extract_amounts, extract_state,
-    detect_risk_patterns, segment_clauses, generate_diff_report
+    detect_risk_patterns, segment_clauses, generate_diff_report,
+    char_lcs_length, calculate_similarity, match_clauses
+)
+from services.diff_engine import (
+    CLAUSE_CACHE_SIZE, CLAUSE_CACHE_MAX_CHARS, _segment_clauses, _SEGMENT_CACHE_SIZE,
+    _LIABILITY_CAP_RE, _DAMAGES_PROTECTION_RE, _WRITTEN_CONFIRMATION_RE
 )
 
 
@@ -33,6 +40,116 @@ def test_extract_state():
     assert extract_state("laws of Delaware") == "Delaware"
     assert extract_state("California jurisdiction") == "California"
     assert extract_state("no state mentioned") == ""
+    
+    # Longest name wins over a state name it contains
+    assert extract_state("laws of West Virginia") == "West Virginia"
+    assert extract_state("laws of Arkansas") == "Arkansas"
+    assert extract_state("laws of Kansas") == "Kansas"
+    # Whole words only, and multi-word names may span a line break
+    assert extract_state("the terms remained in force") == ""
+    assert extract_state("laws of New\nYork") == "New York"
+
+
+def test_clause_cache_bounds():
+    """Test that per-clause caches hit on repeats and skip or evict long-lived entries"""
+    extract_state.cache_clear()
+    
+    assert extract_state("governed by the laws of Texas") == "Texas"
+    assert extract_state("governed by the laws of Texas") == "Texas"
+    assert extract_state.cache_info().hits == 1
+    
+    # Texts over the size limit (e.g. an unsegmented document) are never cached
+    long_text = "governed by the laws of Ohio " * (CLAUSE_CACHE_MAX_CHARS // 10)
+    assert extract_state(long_text) == "Ohio"
+    assert extract_state.cache_info().currsize == 1
+    
+    for i in range(CLAUSE_CACHE_SIZE + 10):
+        extract_state(f"clause {i} under Utah law")
+    assert extract_state.cache_info().currsize == CLAUSE_CACHE_SIZE
+
+
+def _reference_lcs_length(a, b):
+    """Textbook dynamic-programming LCS length"""
+    previous = [0] * (len(b) + 1)
+    for item_a in a:
+        current = [0]
+        for j, item_b in enumerate(b):
+            current.append(previous[j] + 1 if item_a == item_b else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def test_char_lcs_length_matches_reference():
+    """Test the bit-parallel LCS against the dynamic-programming definition"""
+    rng = random.Random(1234)
+    for _ in range(500):
+        a = "".join(rng.choice("abc d") for _ in range(rng.randint(0, 70)))
+        b = "".join(rng.choice("abc d") for _ in range(rng.randint(0, 70)))
+        assert char_lcs_length(a, b) == _reference_lcs_length(a, b)
+        
+        # Edits inside a shared prefix/suffix, as in revised clauses (also as token tuples)
+        prefix, suffix = a[:rng.randint(0, 20)], b[-rng.randint(0, 20):]
+        edited_a, edited_b = prefix + a + suffix, prefix + b[:10] + suffix
+        assert char_lcs_length(edited_a, edited_b) == _reference_lcs_length(edited_a, edited_b)
+        assert char_lcs_length(tuple(edited_a), tuple(edited_b)) == _reference_lcs_length(edited_a, edited_b)
+    
+    # Short-text similarity stays a ratio even when lowercasing changes length
+    assert calculate_similarity("İ", "i\u0307") == 1.0
+    assert calculate_similarity("Payment Terms", "PAYMENT TERMS") == 1.0
+
+
+def test_token_similarity():
+    """Test token-level LCS similarity on long clauses"""
+    assert char_lcs_length([1, 2, 3], [1, 2, 3]) == 3
+    assert char_lcs_length([1, 2, 3], [4, 5, 6]) == 0
+    assert char_lcs_length([1, 2, 3, 4], [1, 3, 4, 5]) == 3
+    
+    # Long clauses are compared word-by-word; these values are pinned so
+    # changes to the algorithm can't silently move the matching thresholds
+    long_a = "The receiving party shall keep all information confidential. " * 5
+    long_b = long_a.replace("receiving", "disclosing")
+    assert calculate_similarity(long_a, long_b) == 0.875
+    
+    confidentiality = (
+        "The Receiving Party shall hold all Confidential Information in strict confidence and shall not "
+        "disclose it to any third party without the prior written consent of the Disclosing Party, "
+        "for a period of five (5) years following the Effective Date."
+    )
+    payment = (
+        "The Client shall pay the Consultant a fee of Ten Thousand Dollars ($10,000) within thirty (30) "
+        "days of receipt of each invoice. Late payments shall accrue interest at one percent per month "
+        "until paid in full."
+    )
+    revised = confidentiality.replace("five (5) years", "one (1) year").replace("strict confidence", "confidence")
+    assert calculate_similarity(confidentiality, revised) == pytest.approx(0.9113924050632911)
+    assert calculate_similarity(confidentiality, payment) == pytest.approx(0.12987012987012986)
+
+
+def test_short_similarity_near_thresholds():
+    """Pin LCS title scores and the matches/severities they give near the decision thresholds"""
+    # Higher than difflib's matching-blocks ratio on unrelated titles (0.22 and 0.15 before)
+    assert calculate_similarity("PAYMENT", "TERMINATION") == pytest.approx(1 / 3)
+    assert calculate_similarity("CONFIDENTIALITY", "TERMINATION") == pytest.approx(4 / 13)
+    
+    # Title and content together score 0.24, just over the 0.2 match floor (difflib: 0.19)
+    payment = {"title": "PAYMENT", "content": "Fixed fee.", "number": ""}
+    termination = {"title": "TERMINATION", "content": "Monthly billing.", "number": ""}
+    assert match_clauses([payment], [termination]) == [(0, 0, pytest.approx(2 / 13))]
+    
+    # Critical clause between 0.4 and 0.6 (difflib: 0.38, High)
+    old, new = "Either party may terminate.", "Terminates after one year."
+    assert calculate_similarity(old, new) == pytest.approx(26 / 53)
+    assert detect_risk_patterns(old, new, "Termination") == ("Medium", "Moderate change to critical clause")
+    
+    # Other clause just over 0.5 (difflib: 0.47, Medium)
+    old, new = "Client may cancel anytime.", "Vendor may terminate."
+    assert calculate_similarity(old, new) == pytest.approx(24 / 47)
+    assert detect_risk_patterns(old, new, "Services") == ("Low", "Minor change")
+    
+    # Critical clause just under 0.6
+    old, new = "Notices must be sent by email.", "Notices go by registered mail only."
+    assert calculate_similarity(old, new) == pytest.approx(38 / 65)
+    assert detect_risk_patterns(old, new, "Payment") == ("Medium", "Moderate change to critical clause")
 
 
 def test_confidentiality_period_reduction():
@@ -70,6 +187,27 @@ def test_payment_increase():
     assert "increased" in risk_type.lower()
 
 
+def test_risk_pattern_gaps():
+    """Test that gapped risk patterns match across periods but not across lines"""
+    assert _LIABILITY_CAP_RE.search(
+        "in no event shall either party's liability under section 9.1 exceed the fees paid"
+    )
+    assert _LIABILITY_CAP_RE.search(
+        "in no event shall acme inc. be liable for amounts that exceed the fees paid"
+    )
+    assert _DAMAGES_PROTECTION_RE.search(
+        "company shall not, under section 4.2, be liable for consequential damages"
+    )
+    assert _WRITTEN_CONFIRMATION_RE.search("oral instructions must be confirmed to writing")
+    assert not _WRITTEN_CONFIRMATION_RE.search("moral rights\nare waived when reduced to writing")
+    assert not _LIABILITY_CAP_RE.search("in no event " + "x" * 500 + " exceed")
+    
+    # Long single-line text (as pdf extraction produces) with many partial matches
+    long_line = "the party shall not disclose data, " * 5000
+    assert not _DAMAGES_PROTECTION_RE.search(long_line)
+    assert _DAMAGES_PROTECTION_RE.search(long_line + "and shall not claim punitive damages")
+
+
 def test_liability_cap_removal():
     """Test detection of liability cap removal"""
     old = "liability of One Hundred Thousand Dollars ($100,000)"
@@ -125,6 +263,80 @@ This is the termination clause.
     assert any("PAYMENT" in t for t in titles)
 
 
+def test_clause_segmentation_cache():
+    """Test that segmentation is cached per text and only keeps a few contracts"""
+    _segment_clauses.cache_clear()
+    text = "1. PAYMENT\nFee of $10,000.\n\n2. TERMINATION\n30 days notice."
+    
+    first = segment_clauses(text)
+    second = segment_clauses(text)
+    assert first == second
+    assert _segment_clauses.cache_info().hits == 1
+    
+    # Callers get copies, so editing them can't corrupt the cache
+    first[0]["content"] = "changed"
+    assert segment_clauses(text)[0]["content"] != "changed"
+    
+    for i in range(_SEGMENT_CACHE_SIZE + 2):
+        segment_clauses(f"Contract number {i}")
+    assert _segment_clauses.cache_info().currsize == _SEGMENT_CACHE_SIZE
+
+
+def _unpruned_match_clauses(clauses_a, clauses_b):
+    """match_clauses without candidate pruning: number match, else full similarity scan"""
+    matches = []
+    used_b = set()
+    for i, clause_a in enumerate(clauses_a):
+        best_match = None
+        best_similarity = 0.0
+        best_content_similarity = None
+        if clause_a.get("number"):
+            best_match = next(
+                (j for j, clause_b in enumerate(clauses_b)
+                 if clause_b.get("number") == clause_a["number"] and j not in used_b),
+                None
+            )
+        if best_match is None:
+            for j, clause_b in enumerate(clauses_b):
+                if j in used_b:
+                    continue
+                title_sim = calculate_similarity(clause_a["title"], clause_b["title"])
+                content_sim = calculate_similarity(clause_a["content"], clause_b["content"])
+                similarity = title_sim * 0.5 + content_sim * 0.5
+                if similarity > best_similarity and similarity > 0.2:
+                    best_similarity = similarity
+                    best_content_similarity = content_sim
+                    best_match = j
+        if best_match is not None:
+            if best_content_similarity is None:
+                best_content_similarity = calculate_similarity(
+                    clause_a["content"], clauses_b[best_match]["content"]
+                )
+            matches.append((i, best_match, best_content_similarity))
+            used_b.add(best_match)
+    return matches
+
+
+def test_match_clauses_pruning_matches_full_scan():
+    """Test that length-bound pruning never changes which clauses are matched"""
+    rng = random.Random(42)
+    # Includes text whose lowercase is longer ("İ" -> "i̇"), as the scores use lowercased lengths
+    words = "the party shall pay fees within days confidential terminate notice liability cap law".split()
+    words += ["İİİİ", "i\u0307i\u0307", "Straße", "ÇAĞRI"]
+    
+    def random_clause():
+        return {
+            "title": rng.choice(["", "PAYMENT", "TERMINATION", "CONFIDENTIALITY", "Fees:", "GOVERNING LAW"]),
+            "content": " ".join(rng.choice(words) for _ in range(rng.choice([1, 2, 8, 30, 60]))),
+            "number": rng.choice(["", "", "1", "2"]),
+        }
+    
+    for _ in range(300):
+        clauses_a = [random_clause() for _ in range(rng.randint(0, 7))]
+        clauses_b = [random_clause() for _ in range(rng.randint(0, 7))]
+        assert match_clauses(clauses_a, clauses_b) == _unpruned_match_clauses(clauses_a, clauses_b)
+
+
 def test_full_report_generation():
     """Test full diff report generation"""
     contract_a = """
@@ -159,6 +371,28 @@ Fee of $15,000 within 15 days.
     assert len(high_risk_diffs) >= 2
 
 
+def test_identical_contracts_short_circuit():
+    """Test that identical inputs return the no-change report without segmenting"""
+    text = """
+1. CONFIDENTIALITY
+Confidential information shall be protected for 5 years.
+
+2. PAYMENT
+Fee of $10,000 within 30 days.
+    """
+    _segment_clauses.cache_clear()
+    report = generate_diff_report(text, text)
+    assert _segment_clauses.cache_info().misses == 0
+    
+    assert report["riskScore"] == 0
+    assert report["diffs"] == []
+    assert {"summary", "verdict", "riskReport"} <= report.keys()
+    
+    # Callers get their own copy to fill in
+    report["diffs"].append({"clause": "Added by caller"})
+    assert generate_diff_report(text, text)["diffs"] == []
+
+
 def test_risk_score_calculation():
     """Test that risk scores are reasonable"""
     # Identical contracts
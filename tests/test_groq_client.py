@@ -0,0 +1,35 @@
+import asyncio
+
+from services import groq_client
+from services.groq_client import get_async_groq_client, close_async_groq_client
+
+
+def test_async_client_lifecycle():
+    """Test one client per loop, replacement on key change, and close on loop shutdown"""
+    async def use_clients():
+        first = await get_async_groq_client("key-1")
+        assert await get_async_groq_client("key-1") is first
+        
+        # A new key replaces (and closes) the loop's client
+        second = await get_async_groq_client("key-2")
+        assert second is not first and first.is_closed()
+        
+        await close_async_groq_client()
+        await close_async_groq_client()  # No client left; nothing to do
+        return second
+    
+    client = asyncio.run(use_clients())
+    
+    assert client.is_closed()
+    assert not groq_client._async_clients
+
+
+def test_async_clients_per_loop():
+    """Test that each event loop gets its own client"""
+    async def get_and_close():
+        client = await get_async_groq_client("key")
+        await close_async_groq_client()
+        return client
+    
+    assert asyncio.run(get_and_close()) is not asyncio.run(get_and_close())
+    assert not groq_client._async_clients
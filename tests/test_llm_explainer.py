@@ -0,0 +1,216 @@
+import asyncio
+import json
+import re
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+from services import llm_explainer
+from services.llm_explainer import (
+    _parse_llm_explanation,
+    _parse_llm_batch_explanations,
+    aenhance_diffs_with_explanations,
+    enhance_diffs_with_explanations,
+    get_llm_explanation,
+    get_template_explanation,
+)
+
+
+def test_parse_explanation_surrounding_text():
+    """Test parsing an explanation wrapped in prose, fences and trailing text"""
+    content = 'Sure!\n```json\n{"explanation": "Cap raised {was $1M}", "confidence": 90}\n```\n' \
+        'Hope this helps. {"explanation": "ignored"}'
+    
+    assert _parse_llm_explanation(content) == {
+        "explanation": "Cap raised {was $1M}",
+        "suggestions": [],
+        "confidence": 90,
+    }
+
+
+def test_parse_explanation_invalid():
+    """Test that responses without a complete object raise"""
+    with pytest.raises(ValueError):
+        _parse_llm_explanation("I cannot explain this change.")
+    
+    with pytest.raises(ValueError):
+        _parse_llm_explanation('{"explanation": "cut off')
+
+
+def test_parse_batch_explanations():
+    """Test mapping batched LLM results back to diffs by id"""
+    content = 'Here you go:\n{"results": [' \
+        '{"id": 2, "explanation": "Second", "suggestions": ["a"], "confidence": 80}, ' \
+        '{"id": "1", "explanation": "First"}]}'
+    
+    first, second, third = _parse_llm_batch_explanations(content, 3)
+    
+    assert first == {"explanation": "First", "suggestions": [], "confidence": 85}
+    assert second == {"explanation": "Second", "suggestions": ["a"], "confidence": 80}
+    assert third is None  # Missing ids fall back to per-diff calls
+
+
+def test_parse_batch_explanations_skips_bad_entries():
+    """Test that malformed, partial, or out-of-range entries are ignored"""
+    content = json.dumps({"results": [
+        {"id": 0, "explanation": "Out of range"},
+        {"id": 3, "explanation": "Out of range"},
+        {"id": "two", "explanation": "Not a number"},
+        {"id": 1, "suggestions": ["no explanation"]},
+        {"explanation": "No id"},
+        "not an object",
+        {"id": 2, "explanation": "Kept"},
+    ]})
+    
+    assert _parse_llm_batch_explanations(content, 2) == [
+        None,
+        {"explanation": "Kept", "suggestions": [], "confidence": 85},
+    ]
+    assert _parse_llm_batch_explanations('{"results": []}', 2) == [None, None]
+    
+    with pytest.raises(ValueError):
+        _parse_llm_batch_explanations("no json here", 1)
+
+
+class FakeAsyncGroq:
+    """Answers batched requests for every diff except the second, and fails single requests"""
+    
+    def __init__(self):
+        self.requests = []
+        self.chat = SimpleNamespace(completions=self)
+    
+    async def create(self, **request):
+        self.requests.append(request)
+        if "response_format" not in request:
+            raise RuntimeError("single request failed")
+        
+        count = len(re.findall(r"^Diff \d+:", request["messages"][1]["content"], re.M))
+        results = [
+            {"id": i, "explanation": f"Batch {i}", "suggestions": ["s"], "confidence": 90}
+            for i in range(1, count + 1) if i != 2
+        ]
+        message = SimpleNamespace(content=json.dumps({"results": results}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_enhance_diffs_batches_llm_requests(monkeypatch):
+    """Test that High/Medium diffs are explained in batches, with fallbacks for gaps"""
+    client = FakeAsyncGroq()
+    
+    async def fake_get_client(api_key):
+        return client
+    
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(llm_explainer, "get_async_groq_client", fake_get_client)
+    monkeypatch.setattr(llm_explainer, "_LLM_CACHE", OrderedDict())
+    
+    diffs = [
+        {"oldText": f"Clause {i} original wording " * 3, "newText": "Revised wording", "severity": "High"}
+        for i in range(llm_explainer.LLM_BATCH_SIZE + 3)
+    ]
+    diffs.append({"oldText": "minor", "newText": "tweak", "severity": "Low"})
+    
+    asyncio.run(aenhance_diffs_with_explanations(diffs))
+    
+    batch_requests = [r for r in client.requests if "response_format" in r]
+    single_requests = [r for r in client.requests if "response_format" not in r]
+    assert len(batch_requests) == 2
+    assert len(single_requests) == 2  # Diff 2 of each batch was missing
+    
+    assert diffs[0]["explanation"] == "Batch 1"
+    assert diffs[llm_explainer.LLM_BATCH_SIZE]["explanation"] == "Batch 1"
+    # Failed fallbacks and low-severity diffs get template explanations
+    assert diffs[1]["explanation"] and not diffs[1]["explanation"].startswith("Batch")
+    assert diffs[-1]["explanation"] and not diffs[-1]["explanation"].startswith("Batch")
+
+
+def test_enhance_diffs_templates_only(monkeypatch):
+    """Test that use_llm=False explains every diff from templates without calling the LLM"""
+    async def no_client(api_key):
+        raise AssertionError("LLM called in template-only mode")
+    
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(llm_explainer, "get_async_groq_client", no_client)
+    
+    diffs = [
+        {"oldText": "Protected for 5 years " * 5, "newText": "Protected for 1 year", "severity": "High"},
+        {"oldText": "minor", "newText": "tweak", "severity": "Low"},
+    ]
+    
+    assert enhance_diffs_with_explanations(diffs) is diffs
+    for diff in diffs:
+        expected = get_template_explanation(diff["oldText"], diff["newText"], diff["severity"])
+        assert diff["explanation"] == expected["explanation"]
+
+
+def test_enhance_diffs_sync_uses_batches(monkeypatch):
+    """Test that the sync use_llm=True path goes through the batched requests and closes its client"""
+    client = FakeAsyncGroq()
+    
+    async def fake_get_client(api_key):
+        return client
+    
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(llm_explainer, "get_async_groq_client", fake_get_client)
+    monkeypatch.setattr(llm_explainer, "_LLM_CACHE", OrderedDict())
+    
+    diffs = [
+        {"oldText": f"Clause {i} original wording " * 3, "newText": "Revised wording", "severity": "High"}
+        for i in range(3)
+    ]
+    
+    closed = []
+    
+    async def fake_close():
+        closed.append(asyncio.get_running_loop())
+    
+    monkeypatch.setattr(llm_explainer, "close_async_groq_client", fake_close)
+    
+    enhance_diffs_with_explanations(diffs, use_llm=True)
+    
+    assert len(closed) == 1  # The temporary loop's client is released
+    assert len([r for r in client.requests if "response_format" in r]) == 1
+    assert diffs[0]["explanation"] == "Batch 1"
+    assert diffs[2]["explanation"] == "Batch 3"
+
+
+def test_get_llm_explanation(monkeypatch):
+    """Test the sync explanation: streamed LLM answer, cache, and template fallbacks"""
+    args = ("Protected for 5 years", "Protected for 1 year", "High", "Period reduced")
+    expected = get_template_explanation(*args)
+    
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    assert get_llm_explanation(*args) == expected
+    
+    requests = []
+    
+    class FakeStream(list):
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc):
+            return False
+    
+    def create(**request):
+        requests.append(request)
+        content = '{"explanation": "Shorter protection", "confidence": 90}'
+        return FakeStream(
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+            for part in (content[:10], content[10:])
+        )
+    
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(llm_explainer, "get_groq_client", lambda api_key: client)
+    monkeypatch.setattr(llm_explainer, "_LLM_CACHE", OrderedDict())
+    
+    explanation = {"explanation": "Shorter protection", "suggestions": [], "confidence": 90}
+    assert get_llm_explanation(*args) == explanation
+    assert get_llm_explanation(*args) == explanation
+    assert len(requests) == 1 and requests[0]["stream"] is True
+    
+    def failing_create(**request):
+        raise RuntimeError("request failed")
+    
+    client.chat.completions.create = failing_create
+    assert get_llm_explanation("other", "text", "High") == get_template_explanation("other", "text", "High")
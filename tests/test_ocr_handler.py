@@ -0,0 +1,110 @@
+import io
+from collections import OrderedDict
+
+import pytest
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from services import ocr_handler
+from services.ocr_handler import extract_text_from_file, extract_from_docx_xml
+
+
+@pytest.fixture
+def empty_text_cache(monkeypatch):
+    """Give each test its own empty extracted-text cache"""
+    monkeypatch.setattr(ocr_handler, "_TEXT_CACHE", OrderedDict())
+    monkeypatch.setattr(ocr_handler, "_TEXT_CACHE_CHARS", 0)
+
+
+def test_text_cache_hit(empty_text_cache, monkeypatch):
+    """Test that re-submitted files are served from the cache"""
+    calls = []
+    
+    def counting_extractor(file_bytes):
+        calls.append(file_bytes)
+        return file_bytes.decode()
+    
+    monkeypatch.setitem(ocr_handler._EXTRACTORS, "txt", counting_extractor)
+    
+    assert extract_text_from_file(b"same contract", "a.txt") == "same contract"
+    assert extract_text_from_file(b"same contract", "b.txt") == "same contract"
+    assert len(calls) == 1
+    
+    extract_text_from_file(b"other contract", "a.txt")
+    assert len(calls) == 2
+
+
+def test_text_cache_eviction(empty_text_cache, monkeypatch):
+    """Test that the cache stays within its character budget, evicting oldest first"""
+    monkeypatch.setattr(ocr_handler, "_TEXT_CACHE_MAX_CHARS", 25)
+    
+    extract_text_from_file(b"a" * 10, "a.txt")
+    extract_text_from_file(b"b" * 10, "b.txt")
+    extract_text_from_file(b"c" * 10, "c.txt")
+    
+    cached = list(ocr_handler._TEXT_CACHE.values())
+    assert cached == ["b" * 10, "c" * 10]
+    assert ocr_handler._TEXT_CACHE_CHARS == 20
+    
+    # Texts larger than the whole budget are returned but never cached
+    assert extract_text_from_file(b"d" * 30, "d.txt") == "d" * 30
+    assert list(ocr_handler._TEXT_CACHE.values()) == cached
+
+
+def test_extension_from_filename(empty_text_cache):
+    """Test that the extension is the text after the last dot, as for dotfiles like '.txt'"""
+    assert extract_text_from_file(b"contract text", ".txt") == "contract text"
+    assert extract_text_from_file(b"contract text", "Contract.v2.TXT") == "contract text"
+    
+    with pytest.raises(Exception, match="Unsupported file format: exe"):
+        extract_text_from_file(b"contract text", "contract.txt.exe")
+
+
+def _build_docx_fixture() -> bytes:
+    """A DOCX with tabs, line/page breaks, a hyperlink and a table"""
+    document = Document()
+    document.add_paragraph("1. PAYMENT TERMS")
+    
+    paragraph = document.add_paragraph("Fee:")
+    run = paragraph.add_run()
+    run.add_tab()
+    run.add_text("$10,000")
+    run.add_break()
+    run.add_text("due within 30 days")
+    run.add_break(WD_BREAK.PAGE)
+    run.add_text("after invoice")
+    
+    # Hyperlinked run, as Word writes it
+    linked = document.add_paragraph("See ")
+    hyperlink = OxmlElement("w:hyperlink")
+    hyperlink.set(qn("r:id"), "rId99")
+    link_run = OxmlElement("w:r")
+    link_text = OxmlElement("w:t")
+    link_text.text = "the rate card"
+    link_run.append(link_text)
+    hyperlink.append(link_run)
+    linked._p.append(hyperlink)
+    linked.add_run(" for details.")
+    
+    # Table text is not part of doc.paragraphs
+    table = document.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "Milestone"
+    table.cell(1, 1).text = "$5,000"
+    
+    document.add_paragraph("")
+    document.add_paragraph("2. TERMINATION")
+    
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_docx_xml_matches_python_docx():
+    """Test the direct DOCX reader against python-docx's paragraph text"""
+    file_bytes = _build_docx_fixture()
+    expected = "\n".join(p.text for p in Document(io.BytesIO(file_bytes)).paragraphs)
+    
+    assert extract_from_docx_xml(file_bytes) == expected
+    assert "Fee:\t$10,000\ndue within 30 days" in expected
+    assert "See the rate card for details." in expected
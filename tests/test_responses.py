@@ -0,0 +1,47 @@
+import json
+from datetime import datetime, date
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+REPORT = {
+    "riskScore": 42.5,
+    "summary": "Liability cap — reduced to €50,000",
+    "changes": [{"clause": "1. PAYMENT", "severity": None, "flags": [True, False]}],
+    "byClauseNumber": {1: "PAYMENT", 2: "TERMINATION"},
+}
+
+
+def test_orjson_response_matches_json_response():
+    """Test that orjson output decodes to the same report the stdlib JSONResponse produced"""
+    from main import ORJSONResponse
+    
+    orjson_body = ORJSONResponse(content=REPORT).body
+    
+    assert json.loads(orjson_body) == json.loads(JSONResponse(content=REPORT).body)
+    assert json.loads(orjson_body)["byClauseNumber"] == {"1": "PAYMENT", "2": "TERMINATION"}
+
+
+def test_orjson_response_datetimes():
+    """Test that datetimes serialize to the ISO strings jsonable_encoder gives"""
+    from main import ORJSONResponse
+    
+    content = {"createdAt": datetime(2026, 10, 15, 9, 30, 5), "effective": date(2026, 1, 1)}
+    
+    assert json.loads(ORJSONResponse(content=content).body) == jsonable_encoder(content)
+
+
+def test_orjson_response_numpy():
+    """Test that numpy scalars and arrays serialize as plain JSON numbers"""
+    np = pytest.importorskip("numpy")
+    from main import ORJSONResponse
+    
+    content = {"score": np.float64(0.75), "count": np.int64(3), "weights": np.array([1, 2])}
+    
+    assert json.loads(ORJSONResponse(content=content).body) == {
+        "score": 0.75,
+        "count": 3,
+        "weights": [1, 2],
+    }